@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los compiladores
+Genera con una semilla fija un corpus de expresiones válidas sobre a..g
+(profundidad, mezcla de operadores y tasa de menos unario configurables) y
+compila con cada compilador*.py las expresiones que acepta. Reporta el
+rendimiento (expresiones por segundo) y la calidad del código: líneas,
+accesos a memoria estáticos y temporales pico. Los resultados se guardan
+como JSON para compararlos con una línea base y ver regresiones.
+"""
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+VARIABLES = 'abcdefg'
+COMPILADORES = ['compilador', 'compilador2', 'compilador3', 'compilador4', 'compilador5']
+MEZCLA_POR_DEFECTO = '+=3,-=3,*=2,/=1,%=1'
+
+# Métricas de calidad: más es peor. El rendimiento se compara aparte con tolerancia
+METRICAS_CALIDAD = ('lineas', 'accesos_memoria', 'temporales_pico')
+
+
+def parsear_mezcla(texto: str) -> Dict[str, float]:
+    """'+=3,-=3,*=1' -> {'+': 3.0, '-': 3.0, '*': 1.0}"""
+    mezcla = {}
+    for parte in texto.split(','):
+        operador, _, peso = parte.strip().partition('=')
+        if operador not in ('+', '-', '*', '/', '%'):
+            raise Exception(f"Error: Operador inválido en la mezcla: '{operador}'")
+        mezcla[operador] = float(peso or 1)
+    if not any(mezcla.values()):
+        raise Exception("Error: La mezcla de operadores no tiene pesos positivos")
+    return mezcla
+
+
+def generar_expresion(rng: random.Random, profundidad: int, mezcla: Dict[str, float],
+                      menos_unario: float = 0.0, hoja: float = 0.3) -> str:
+    """
+    Expresión aleatoria de a lo más 'profundidad' niveles de operadores.
+    Cada subexpresión compuesta va entre paréntesis; 'menos_unario' es la
+    probabilidad de anteponer '-' a cada operando.
+    """
+    operadores = list(mezcla)
+    pesos = list(mezcla.values())
+
+    def operando(nivel: int) -> str:
+        if nivel == 0 or rng.random() < hoja:
+            texto = rng.choice(VARIABLES)
+        else:
+            texto = f"({binaria(nivel)})"
+        if rng.random() < menos_unario:
+            texto = f"-{texto}"
+        return texto
+
+    def binaria(nivel: int) -> str:
+        operador = rng.choices(operadores, pesos)[0]
+        return f"{operando(nivel - 1)} {operador} {operando(nivel - 1)}"
+
+    if profundidad <= 0:
+        return f"result = {operando(0)}"
+    return f"result = {binaria(profundidad)}"
+
+
+def generar_corpus(semilla: int, cantidad: int, profundidad: int, mezcla: Dict[str, float],
+                   menos_unario: float) -> List[str]:
+    rng = random.Random(semilla)
+    return [generar_expresion(rng, rng.randint(1, profundidad), mezcla, menos_unario)
+            for _ in range(cantidad)]
+
+
+def medir_compilador(modulo: str, corpus: List[str], repeticiones: int,
+                     opciones: Optional[List[str]] = None) -> Dict[str, object]:
+    """
+    Compila el corpus con un compilador: primero una pasada para saber qué
+    expresiones acepta y medir la calidad, luego 'repeticiones' pasadas
+    cronometradas sobre las aceptadas (se informa la más rápida)
+    """
+    compilador = importlib.import_module(modulo).Compilador(
+        **{opcion: True for opcion in (opciones or [])})
+    aceptadas = []
+    lineas = accesos = pico = suma_temporales = 0
+    for expresion in corpus:
+        try:
+            _, n_lineas, n_accesos = compilador.compile(expresion)
+        except Exception:
+            continue
+        aceptadas.append(expresion)
+        temporales = getattr(compilador, 'temp_counter', 0)
+        lineas += n_lineas
+        accesos += n_accesos
+        pico = max(pico, temporales)
+        suma_temporales += temporales
+
+    mejor = None
+    for _ in range(repeticiones if aceptadas else 0):
+        inicio = time.perf_counter()
+        for expresion in aceptadas:
+            compilador.compile(expresion)
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+
+    return {
+        'aceptadas': len(aceptadas),
+        'rechazadas': len(corpus) - len(aceptadas),
+        'expresiones_por_segundo': round(len(aceptadas) / mejor, 1) if mejor else 0.0,
+        'lineas': lineas,
+        'accesos_memoria': accesos,
+        'temporales_pico': pico,
+        'temporales_promedio': round(suma_temporales / len(aceptadas), 3) if aceptadas else 0.0,
+    }
+
+
+def parsear_variante(texto: str) -> Tuple[str, List[str]]:
+    """'compilador5:peephole,cse' -> ('compilador5', ['peephole', 'cse'])"""
+    modulo, _, opciones = texto.partition(':')
+    return modulo, [opcion for opcion in opciones.split(',') if opcion]
+
+
+def comparar(actual: Dict, base: Dict, tolerancia: Optional[float] = None) -> List[str]:
+    """
+    Regresiones de 'actual' respecto de 'base' (misma configuración de corpus).
+    Las expresiones por segundo dependen de la máquina: solo se comparan con
+    una tolerancia y si la línea base las tiene.
+    """
+    if actual['configuracion'] != base['configuracion']:
+        raise Exception("Error: La línea base se generó con otra configuración de corpus")
+    regresiones = []
+    for variante, medido in actual['resultados'].items():
+        anterior = base['resultados'].get(variante)
+        if anterior is None:
+            continue
+        if medido['aceptadas'] != anterior['aceptadas']:
+            regresiones.append(f"{variante}: acepta {medido['aceptadas']} expresiones "
+                               f"(antes {anterior['aceptadas']})")
+            continue
+        for metrica in METRICAS_CALIDAD:
+            if medido[metrica] > anterior[metrica]:
+                regresiones.append(f"{variante}: {metrica} {anterior[metrica]} -> {medido[metrica]}")
+        if tolerancia is None or 'expresiones_por_segundo' not in anterior:
+            continue
+        minimo = anterior['expresiones_por_segundo'] * (1 - tolerancia)
+        if medido['expresiones_por_segundo'] < minimo:
+            regresiones.append(f"{variante}: expresiones_por_segundo "
+                               f"{anterior['expresiones_por_segundo']} -> "
+                               f"{medido['expresiones_por_segundo']}")
+    return regresiones
+
+
+def diferencia(valor: float, anterior: Optional[float]) -> str:
+    if not anterior:
+        return ""
+    return f" ({(valor - anterior) / anterior * 100:+.1f}%)"
+
+
+def imprimir_resultados(resultados: Dict, base: Optional[Dict] = None) -> None:
+    for variante, medido in resultados['resultados'].items():
+        anterior = (base or {}).get('resultados', {}).get(variante, {})
+        print(f"; {variante}: {medido['aceptadas']} aceptadas, {medido['rechazadas']} rechazadas")
+        if not medido['aceptadas']:
+            continue
+        for metrica in ('expresiones_por_segundo',) + METRICAS_CALIDAD + ('temporales_promedio',):
+            valor = medido[metrica]
+            print(f";   {metrica}: {valor}{diferencia(valor, anterior.get(metrica))}")
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Mide rendimiento y calidad de código de los compiladores sobre un "
+                    "corpus aleatorio reproducible")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--cantidad', type=int, default=500,
+                        help="Expresiones del corpus (por defecto 500)")
+    parser.add_argument('--profundidad', type=int, default=4,
+                        help="Niveles máximos de operadores por expresión (por defecto 4)")
+    parser.add_argument('--mezcla', default=MEZCLA_POR_DEFECTO,
+                        help=f"Pesos de los operadores (por defecto '{MEZCLA_POR_DEFECTO}')")
+    parser.add_argument('--menos-unario', type=float, default=0.1,
+                        help="Probabilidad de anteponer '-' a un operando (por defecto 0.1)")
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="Pasadas cronometradas por compilador; se toma la más rápida")
+    parser.add_argument('--variante', action='append', default=[],
+                        help="Compilador a medir, con opciones: compilador5:peephole,cse "
+                             "(se puede repetir; por defecto los cinco sin opciones)")
+    parser.add_argument('--guardar', default=None, help="Guarda los resultados en este JSON")
+    parser.add_argument('--comparar', default=None, help="JSON de línea base a comparar")
+    parser.add_argument('--tolerancia', type=float, default=None,
+                        help="Compara también las expresiones por segundo, aceptando esta caída "
+                             "(ej: 0.2 = 20%%). Por defecto no se comparan: dependen de la máquina")
+    parser.add_argument('--sin-rendimiento', action='store_true',
+                        help="No guarda las expresiones por segundo (para una línea base compartida)")
+    args = parser.parse_args()
+
+    try:
+        mezcla = parsear_mezcla(args.mezcla)
+        base = None
+        if args.comparar:
+            with open(args.comparar, encoding='utf-8') as archivo:
+                base = json.load(archivo)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    configuracion = {
+        'semilla': args.semilla,
+        'cantidad': args.cantidad,
+        'profundidad': args.profundidad,
+        'mezcla': mezcla,
+        'menos_unario': args.menos_unario,
+    }
+    corpus = generar_corpus(args.semilla, args.cantidad, args.profundidad, mezcla,
+                            args.menos_unario)
+    resultados = {'configuracion': configuracion, 'resultados': {}}
+    for variante in args.variante or COMPILADORES:
+        modulo, opciones = parsear_variante(variante)
+        resultados['resultados'][variante] = medir_compilador(
+            modulo, corpus, args.repeticiones, opciones)
+
+    imprimir_resultados(resultados, base)
+    if args.guardar:
+        if args.sin_rendimiento:
+            for medido in resultados['resultados'].values():
+                medido.pop('expresiones_por_segundo')
+        with open(args.guardar, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+            archivo.write("\n")
+
+    if base is not None:
+        try:
+            regresiones = comparar(resultados, base, args.tolerancia)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        for regresion in regresiones:
+            print(f"; Regresión: {regresion}")
+        if regresiones:
+            sys.exit(1)
+        print("; Sin regresiones respecto de la línea base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Cache de compilación direccionada por contenido
+Se ubica delante de Compilador.compile(): la clave combina los tokens de la
+expresión (según el tokenizador del propio compilador), la versión del
+compilador y sus opciones. Tiene una capa LRU en memoria y, opcionalmente, un
+almacén en disco que sobrevive entre procesos.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+from collections import OrderedDict
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+
+def modulos_locales(modulo: ModuleType) -> List[ModuleType]:
+    """
+    El módulo y los módulos del mismo directorio que importa, directa o
+    indirectamente (ir.py, peor_caso.py, ...), ordenados por nombre
+    """
+    directorio = os.path.dirname(os.path.abspath(modulo.__file__))
+    encontrados = {modulo.__name__: modulo}
+    pendientes = [modulo]
+    while pendientes:
+        actual = pendientes.pop()
+        for valor in vars(actual).values():
+            if isinstance(valor, ModuleType):
+                importado = valor
+            else:
+                importado = sys.modules.get(getattr(valor, '__module__', None) or '')
+            archivo = getattr(importado, '__file__', None)
+            if (archivo is None or importado.__name__ in encontrados or
+                    os.path.dirname(os.path.abspath(archivo)) != directorio):
+                continue
+            encontrados[importado.__name__] = importado
+            pendientes.append(importado)
+    return [encontrados[nombre] for nombre in sorted(encontrados)]
+
+
+def version_compilador(compilador) -> str:
+    """
+    Huella del código fuente del compilador y de los módulos locales que usa:
+    un cambio en cualquiera (por ejemplo en las reglas peephole de ir.py)
+    invalida la cache
+    """
+    huella = hashlib.sha256()
+    for modulo in modulos_locales(sys.modules[type(compilador).__module__]):
+        huella.update(modulo.__name__.encode('utf-8') + b'\0')
+        huella.update(inspect.getsource(modulo).encode('utf-8'))
+    return huella.hexdigest()[:16]
+
+
+def opciones_compilador(compilador) -> Dict[str, object]:
+    """Valores actuales de los parámetros del constructor (las reglas peephole por nombre)"""
+    opciones = {}
+    for nombre in inspect.signature(type(compilador).__init__).parameters:
+        if nombre == 'self':
+            continue
+        valor = getattr(compilador, nombre, None)
+        if nombre == 'peephole_rules' and valor is not None:
+            valor = [regla for regla, _ in valor]
+        opciones[nombre] = valor
+    return opciones
+
+
+def normalizar_expresion(compilador, expresion: str) -> Optional[str]:
+    """
+    Forma normalizada de la expresión: los tokens que produce el tokenizador
+    del propio compilador (tokenize_expression, o parse_expression en
+    compilador.py y compilador2.py, que solo quitan ' ' y rechazan tabs y
+    saltos de línea), separados por un espacio. Así dos expresiones comparten
+    clave solo si el compilador las ve iguales. Retorna None si la expresión
+    no es válida o el compilador no tiene tokenizador (se compila sin cache).
+    """
+    if '=' not in expresion:
+        return None
+    tokenizar = (getattr(compilador, 'tokenize_expression', None) or
+                 getattr(compilador, 'parse_expression', None))
+    if tokenizar is None:
+        return None
+    try:
+        return ' '.join(tokenizar(expresion.split('=', 1)[1].strip())) or None
+    except Exception:
+        return None
+
+
+class CacheCompilacion:
+    """
+    Envuelve un Compilador con la misma interfaz compile(). Los aciertos
+    retornan el assembly y las estadísticas guardadas sin volver a compilar.
+    """
+
+    def __init__(self, compilador, capacidad: int = 1024, directorio: Optional[str] = None):
+        self.compilador = compilador
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self.entradas: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.prefijo = json.dumps({'modulo': type(compilador).__module__,
+                                   'version': version_compilador(compilador),
+                                   'opciones': opciones_compilador(compilador)},
+                                  sort_keys=True)
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.temp_counter = 0
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, normalizada: str) -> str:
+        return hashlib.sha256(f"{self.prefijo}\n{normalizada}".encode('utf-8')).hexdigest()
+
+    def ruta_disco(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def leer_disco(self, clave: str) -> Optional[Dict]:
+        if not self.directorio:
+            return None
+        try:
+            with open(self.ruta_disco(clave), encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return None
+
+    def escribir_disco(self, clave: str, entrada: Dict) -> None:
+        """Escritura atómica: otro proceso nunca ve un archivo a medias"""
+        if not self.directorio:
+            return
+        ruta = self.ruta_disco(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(entrada, archivo)
+        os.replace(temporal, ruta)
+
+    def guardar(self, clave: str, entrada: Dict) -> None:
+        """Inserta en la capa LRU desalojando la entrada usada hace más tiempo"""
+        self.entradas[clave] = entrada
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.capacidad:
+            self.entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def buscar(self, clave: str) -> Optional[Dict]:
+        entrada = self.entradas.get(clave)
+        if entrada is not None:
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+        entrada = self.leer_disco(clave)
+        if entrada is not None:
+            self.aciertos_disco += 1
+            self.guardar(clave, entrada)
+        return entrada
+
+    def compile(self, expression: str) -> Tuple[str, int, int]:
+        normalizada = normalizar_expresion(self.compilador, expression)
+        if normalizada is None:
+            # Expresión inválida: compile() genera el mensaje de error de siempre
+            self.fallos += 1
+            return self.compilador.compile(expression)
+
+        clave = self.clave(normalizada)
+        entrada = self.buscar(clave)
+        if entrada is None:
+            self.fallos += 1
+            assembly, lineas, accesos = self.compilador.compile(expression)
+            entrada = {'assembly': assembly, 'lineas': lineas, 'accesos_memoria': accesos,
+                       'temporales': getattr(self.compilador, 'temp_counter', 0)}
+            self.guardar(clave, entrada)
+            self.escribir_disco(clave, entrada)
+
+        self.temp_counter = entrada['temporales']
+        return entrada['assembly'], entrada['lineas'], entrada['accesos_memoria']
+
+    def como_dict(self) -> Dict[str, int]:
+        return {
+            'aciertos': self.aciertos,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'entradas': len(self.entradas),
+        }
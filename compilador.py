@@ -9,6 +9,8 @@ import re
 import sys
 from typing import List, Tuple, Dict
 
+import ir
+
 
 class Compilador:
     def __init__(self):
@@ -170,6 +172,13 @@ class Compilador:
         Returns:
             Tupla con (código assembly, líneas generadas, accesos a memoria)
         """
+        return ir.compile_with(self, expression)
+    
+    def passes(self) -> List[Tuple[str, ir.Pass]]:
+        return []
+    
+    def lower(self, expression: str) -> ir.Program:
+        """Genera el código de la expresión como programa en representación intermedia"""
         self.reset()
         
         # Extraer la expresión del lado derecho
@@ -186,17 +195,9 @@ class Compilador:
         # Almacenar resultado
         self.store_variable('result', result_reg)
         
-        # Generar código completo con DATA section
-        code = "; Valores iniciales (cambiar por los valores reales al ejecutar)\n"
-        code += "DATA:\n"
-        for var in self.variables:
-            code += f"{self.get_var_name(var)} 0\n"
-        code += "v_error 0\n"
-        code += "v_result 0\n"
-        code += "\nCODE:\n"
-        code += "\n".join(self.assembly_code)
-        
-        return code, self.lines_count, self.memory_accesses
+        data = [self.get_var_name(var) for var in self.variables] + ["v_error", "v_result"]
+        return ir.Program(self.assembly_code, data,
+                          header="; Valores iniciales (cambiar por los valores reales al ejecutar)")
 
 
 def main():
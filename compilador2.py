@@ -8,6 +8,8 @@ Versión parcial: solo operadores + y -
 import sys
 from typing import List, Tuple
 
+import ir
+
 
 class Compilador:
     def __init__(self):
@@ -85,6 +87,13 @@ class Compilador:
         Returns:
             Tupla con (código assembly, líneas generadas, accesos a memoria)
         """
+        return ir.compile_with(self, expression)
+    
+    def passes(self) -> List[Tuple[str, ir.Pass]]:
+        return []
+    
+    def lower(self, expression: str) -> ir.Program:
+        """Genera el código de la expresión como programa en representación intermedia"""
         self.reset()
         
         # Extraer la expresión del lado derecho
@@ -126,17 +135,8 @@ class Compilador:
         self.add_instruction("MOV (result), A")
         self.memory_accesses += 1
         
-        # Generar código completo
-        code = "; Compilado automáticamente\n"
-        code += "DATA:\n"
-        for var in self.variables:
-            code += f"{var} 0\n"
-        code += "error 0\n"
-        code += "result 0\n"
-        code += "\nCODE:\n"
-        code += "\n".join(self.assembly_code)
-        
-        return code, self.lines_count, self.memory_accesses
+        data = self.variables + ["error", "result"]
+        return ir.Program(self.assembly_code, data, header="; Compilado automáticamente")
 
 
 def main():
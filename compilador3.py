@@ -8,6 +8,8 @@ Versión parcial: solo operadores + y -
 import sys
 from typing import List, Tuple
 
+import ir
+
 
 class Compilador:
     def __init__(self):
@@ -83,6 +85,13 @@ class Compilador:
         Returns:
             Tupla con (código assembly, líneas generadas, accesos a memoria)
         """
+        return ir.compile_with(self, expression)
+    
+    def passes(self) -> List[Tuple[str, ir.Pass]]:
+        return []
+    
+    def lower(self, expression: str) -> ir.Program:
+        """Genera el código de la expresión como programa en representación intermedia"""
         self.reset()
         
         # Extraer la expresión del lado derecho
@@ -128,18 +137,8 @@ class Compilador:
         self.add_instruction("MOV (v_result), A")
         self.memory_accesses += 1
         
-        
-        # Generar código completo con secciones DATA y CODE
-        full_assembly = "; Valores iniciales (cambiar por los valores reales)\n"
-        full_assembly += "DATA:\n"
-        for var in self.variables:
-            full_assembly += f"v_{var} 0\n"
-        full_assembly += "v_error 0\n"
-        full_assembly += "v_result 0\n"
-        full_assembly += "\nCODE:\n"
-        full_assembly += "\n".join(self.assembly_code)
-        
-        return full_assembly, self.lines_count, self.memory_accesses
+        data = [f"v_{var}" for var in self.variables] + ["v_error", "v_result"]
+        return ir.Program(self.assembly_code, data, header="; Valores iniciales (cambiar por los valores reales)")
 
 
 def main():
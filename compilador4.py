@@ -6,17 +6,24 @@ Soporta operadores: +, -, *, /, %
 Usa solo registros A y B
 """
 
+import heapq
 import sys
 from typing import List, Tuple
 
+import ir
+
 
 class Compilador:
-    def __init__(self):
+    def __init__(self, peephole: bool = False, extended_isa: bool = False):
+        self.peephole = peephole  # Pasadas comunes de ir.py sobre el programa
+        self.extended_isa = extended_isa  # Intercambio de factores de * con JCR (solo en simulador.py)
         self.lines_count = 0
         self.memory_accesses = 0
         self.assembly_code = []
         self.variables = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
-        self.temp_counter = 0  # Contador para variables temporales
+        self.temp_counter = 0  # Contador para variables temporales (slots en DATA)
+        self.temps_requested = 0  # Temporales pedidos en total (sin reutilizar)
+        self.free_temps = []  # Slots liberados, listos para reutilizar
         self.op_id_counter = 0  # Contador para IDs únicos de operaciones
         
     def reset(self):
@@ -25,6 +32,8 @@ class Compilador:
         self.memory_accesses = 0
         self.assembly_code = []
         self.temp_counter = 0
+        self.temps_requested = 0
+        self.free_temps = []
         self.op_id_counter = 0
         
     def add_instruction(self, instruction: str):
@@ -34,10 +43,20 @@ class Compilador:
     
     def get_temp_var(self) -> str:
         """Obtiene el nombre de una variable temporal"""
+        self.temps_requested += 1
+        # Reutilizar primero el slot liberado de menor número
+        if self.free_temps:
+            return f"v_temp{heapq.heappop(self.free_temps)}"
         temp = f"v_temp{self.temp_counter}"
         self.temp_counter += 1
         return temp
     
+    def free_temp_var(self, *temps: str):
+        """Libera variables temporales cuyo último uso ya fue emitido"""
+        for temp in temps:
+            if temp.startswith("v_temp"):
+                heapq.heappush(self.free_temps, int(temp[len("v_temp"):]))
+    
     def tokenize_expression(self, expression: str) -> List[str]:
         """Convierte una expresión en una lista de tokens con detección de errores"""
         tokens = []
@@ -135,39 +154,72 @@ class Compilador:
     
     def generate_multiplication(self, var1: str, var2: str) -> List[str]:
         """Genera código assembly para multiplicación usando solo A y B"""
-        # Multiplicación: resultado = 0; for i in range(var2): resultado += var1
+        # Multiplicación binaria (desplazamiento y suma), a lo más 8 iteraciones:
+        # por cada bit encendido de var2 (con extended_isa, del menor de los dos
+        # bytes sin signo) se suma el otro desplazado a su posición. El producto
+        # módulo 256 no depende del orden, y el menor tiene menos bits que recorrer
         op_id = self.op_id_counter
         self.op_id_counter += 1
         temp_result = self.get_temp_var()
         temp_counter = self.get_temp_var()
+        temp_multiplicand = self.get_temp_var()
+        temp_mask = self.get_temp_var()
         
         code = []
-        # Inicializar resultado en 0
+        # Inicializar resultado en 0 y máscara en el bit menos significativo
         code.append(f"MOV A, 0")
         code.append(f"MOV ({temp_result}), A")
+        code.append(f"MOV A, 1")
+        code.append(f"MOV ({temp_mask}), A")
         
-        # Cargar var2 en B (contador)
+        # Copiar var1 (se desplaza) y var2 (bits pendientes)
+        code.append(f"MOV A, (v_{var1})")
+        code.append(f"MOV ({temp_multiplicand}), A")
         code.append(f"MOV B, (v_{var2})")
         code.append(f"MOV ({temp_counter}), B")
         
+        if self.extended_isa:
+            # Si var1 < var2 sin signo (JCR salta con el préstamo del CMP), var1
+            # pasa a ser el contador
+            code.append(f"CMP B, A")
+            code.append(f"JCR loop_mul_{op_id}")
+            code.append(f"JEQ loop_mul_{op_id}")
+            code.append(f"MOV ({temp_counter}), A")
+            code.append(f"MOV ({temp_multiplicand}), B")
+        
         # Etiqueta de inicio del loop
         loop_start = f"loop_mul_{op_id}"
         code.append(f"{loop_start}:")
         
-        # Verificar si contador es 0
+        # Terminar cuando no quedan bits pendientes
         code.append(f"MOV A, ({temp_counter})")
         code.append(f"CMP A, 0")
         code.append(f"JEQ end_mul_{op_id}")
         
-        # Sumar var1 al resultado
-        code.append(f"MOV A, ({temp_result})")
-        code.append(f"ADD A, (v_{var1})")
-        code.append(f"MOV ({temp_result}), A")
+        # Verificar el bit actual
+        code.append(f"MOV B, ({temp_mask})")
+        code.append(f"AND A, B")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ shift_mul_{op_id}")
         
-        # Decrementar contador
+        # Quitar el bit de los pendientes y sumar var1 desplazado
         code.append(f"MOV A, ({temp_counter})")
-        code.append(f"SUB A, 1")
+        code.append(f"SUB A, B")
         code.append(f"MOV ({temp_counter}), A")
+        code.append(f"MOV A, ({temp_result})")
+        code.append(f"ADD A, ({temp_multiplicand})")
+        code.append(f"MOV ({temp_result}), A")
+        
+        # Duplicar multiplicando y máscara
+        code.append(f"shift_mul_{op_id}:")
+        code.append(f"MOV A, ({temp_multiplicand})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({temp_multiplicand}), A")
+        code.append(f"MOV A, ({temp_mask})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({temp_mask}), A")
         
         # Saltar al inicio del loop
         code.append(f"JMP {loop_start}")
@@ -176,6 +228,7 @@ class Compilador:
         # Cargar resultado en A
         code.append(f"MOV A, ({temp_result})")
         
+        self.free_temp_var(temp_result, temp_counter, temp_multiplicand, temp_mask)
         return code
     
     def generate_division(self, var1: str, var2: str) -> List[str]:
@@ -234,6 +287,7 @@ class Compilador:
         code.append(f"MOV (v_error), 1")  # Marcar error
         code.append(f"div_end_{op_id}:")
         
+        self.free_temp_var(temp_dividend, temp_result)
         return code
     
     def generate_modulo(self, var1: str, var2: str) -> List[str]:
@@ -282,6 +336,7 @@ class Compilador:
         code.append(f"MOV (v_error), 1")  # Marcar error
         code.append(f"mod_end_{op_id}:")
         
+        self.free_temp_var(temp_dividend)
         return code
     
     def compile_postfix(self, postfix: List[str]) -> None:
@@ -321,6 +376,8 @@ class Compilador:
                 self.add_instruction(f"MOV ({result_temp}), A")
                 self.memory_accesses += 1
                 stack.append(result_temp)
+                # Los operandos ya no se usan: liberar sus slots
+                self.free_temp_var(op1, op2)
             elif token == '-':
                 if len(stack) < 2:
                     raise Exception("Error: Operador '-' requiere dos operandos")
@@ -337,6 +394,8 @@ class Compilador:
                 self.add_instruction(f"MOV ({result_temp}), A")
                 self.memory_accesses += 1
                 stack.append(result_temp)
+                # Los operandos ya no se usan: liberar sus slots
+                self.free_temp_var(op1, op2)
             elif token == '*':
                 if len(stack) < 2:
                     raise Exception("Error: Operador '*' requiere dos operandos")
@@ -357,6 +416,8 @@ class Compilador:
                 self.add_instruction(f"MOV ({result_temp}), A")
                 self.memory_accesses += 1
                 stack.append(result_temp)
+                # Los operandos ya no se usan: liberar sus slots
+                self.free_temp_var(op1, op2)
             elif token == '/':
                 if len(stack) < 2:
                     raise Exception("Error: Operador '/' requiere dos operandos")
@@ -376,6 +437,8 @@ class Compilador:
                 self.add_instruction(f"MOV ({result_temp}), A")
                 self.memory_accesses += 1
                 stack.append(result_temp)
+                # Los operandos ya no se usan: liberar sus slots
+                self.free_temp_var(op1, op2)
             elif token == '%':
                 if len(stack) < 2:
                     raise Exception("Error: Operador '%' requiere dos operandos")
@@ -395,6 +458,8 @@ class Compilador:
                 self.add_instruction(f"MOV ({result_temp}), A")
                 self.memory_accesses += 1
                 stack.append(result_temp)
+                # Los operandos ya no se usan: liberar sus slots
+                self.free_temp_var(op1, op2)
         
         if len(stack) != 1:
             raise Exception("Error: Expresión inválida - resultado no único")
@@ -414,6 +479,17 @@ class Compilador:
         Returns:
             Tupla con (código assembly, líneas generadas, accesos a memoria)
         """
+        return ir.compile_with(self, expression)
+    
+    def passes(self) -> List[Tuple[str, ir.Pass]]:
+        if not self.peephole:
+            return []
+        return [("peephole", ir.peephole_pass()),
+                ("dead_temp_stores", ir.dead_temp_stores),
+                ("compact_temps", ir.compact_temps)]
+    
+    def lower(self, expression: str) -> ir.Program:
+        """Genera el código de la expresión como programa en representación intermedia"""
         self.reset()
         
         # Extraer la expresión del lado derecho
@@ -443,22 +519,9 @@ class Compilador:
         self.add_instruction("MOV (v_result), A")
         self.memory_accesses += 1
         
-        # Generar código completo con secciones DATA y CODE
-        full_assembly = "; Valores iniciales (cambiar por los valores reales)\n"
-        full_assembly += "DATA:\n"
-        for var in self.variables:
-            full_assembly += f"v_{var} 0\n"
-        full_assembly += "v_error 0\n"
-        full_assembly += "v_result 0\n"
-        
-        # Agregar variables temporales
-        for i in range(self.temp_counter):
-            full_assembly += f"v_temp{i} 0\n"
-        
-        full_assembly += "\nCODE:\n"
-        full_assembly += "\n".join(self.assembly_code)
-        
-        return full_assembly, self.lines_count, self.memory_accesses
+        data = [f"v_{var}" for var in self.variables] + ["v_error", "v_result"]
+        return ir.Program(self.assembly_code, data, self.temp_counter,
+                          header="; Valores iniciales (cambiar por los valores reales)")
 
 
 def main():
@@ -482,6 +545,8 @@ def main():
         print(f"\n; Estadísticas:")
         print(f"; Líneas generadas: {lines}")
         print(f"; Accesos a memoria: {memory}")
+        print(f"; Temporales: {compilador.temp_counter} en DATA (pico) de "
+              f"{compilador.temps_requested} pedidos")
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
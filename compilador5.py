@@ -6,118 +6,625 @@ Soporta operadores: +, -, *, /, %
 Con manejo correcto de números negativos y detección de overflow
 """
 
+import argparse
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import re
+import shutil
 import sys
-from typing import List, Tuple
+import tempfile
+import time
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
+import ir
+from ir import PEEPHOLE_RULES, PeepholeRule, count_memory_accesses
+from peor_caso import imprimir_reporte, reporte_peor_caso
 
-class Compilador:
+
+BINARY_OPERATORS = ('+', '-', '*', '/', '%')
+COMMUTATIVE_OPERATORS = ('+', '*')
+# Operadores internos que genera la simplificación (no existen en el fuente):
+#   neg       -x, con overflow si x = -128
+#   chk_min   x, con overflow si x = -128 (resultado de -(-x))
+#   chk_zero  0, con error de división por cero si x = 0 (resultado de x % x)
+#   zero_of   0, evaluando x solo por sus errores (resultado de x - x)
+UNARY_OPERATORS = ('neg', 'chk_min', 'chk_zero', 'zero_of')
+# Variantes con los operandos invertidos que genera el reordenamiento de la
+# evaluación: 'y x rsub' calcula x - y (el operando derecho se evaluó primero)
+REVERSED_OPERATORS = {'rsub': '-', 'rdiv': '/', 'rmod': '%'}
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2}
+
+
+class ExpressionError(Exception):
+    """Error en la expresión fuente: formato, tokens, paréntesis u operandos"""
+
+
+def arity(token: str) -> int:
+    if token in BINARY_OPERATORS or token in REVERSED_OPERATORS:
+        return 2
+    if token in UNARY_OPERATORS:
+        return 1
+    return 0
+
+
+def is_literal(token: str) -> bool:
+    """Constante entera del fuente (0 a 127); '0' también lo genera el menos unario"""
+    return token.isdigit()
+
+
+def is_power_of_two(value: int) -> bool:
+    return value > 0 and value & (value - 1) == 0
+
+
+def with_lookahead(tokens: Iterable[str]) -> Iterator[Tuple[str, Optional[str]]]:
+    """(token, token siguiente o None), leyendo un solo token por adelantado"""
+    tokens = iter(tokens)
+    token = next(tokens, None)
+    while token is not None:
+        following = next(tokens, None)
+        yield token, following
+        token = following
+
+
+def read_characters(source, chunk_size: int = 65536) -> Iterator[str]:
+    """Caracteres de un archivo de texto, un archivo binario o un mmap, leídos por bloques"""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('latin-1')
+        yield from chunk
+
+
+# Fases que mide el perfil, además de los generate_* y check_overflow_*
+PROFILED_METHODS = ('tokenize_expression', 'shunting_yard', 'compile_postfix')
+
+
+class CompileProfile:
+    """
+    Tiempo, llamadas y líneas emitidas por fase. Los tiempos son inclusivos:
+    compile_postfix incluye los generate_* que llama. Se acumula entre
+    compilaciones (reset() no lo borra).
+    """
+    
     def __init__(self):
+        # fase -> [llamadas, segundos, líneas emitidas]
+        self.phases: Dict[str, List] = {}
+    
+    def record(self, phase: str, seconds: float, lines: int) -> None:
+        entry = self.phases.setdefault(phase, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += lines
+    
+    def wrap(self, compiler: 'Compilador', phase: str, method: Callable) -> Callable:
+        """
+        Envuelve un método: los generate_* y check_overflow_* que retornan código
+        cuentan sus líneas, el resto cuenta lo que agregó add_instruction
+        """
+        def timed(*args, **kwargs):
+            lines = compiler.lines_count
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            if phase in ('tokenize_expression', 'shunting_yard'):
+                emitted = 0  # producen tokens, no código
+            elif isinstance(result, list):
+                emitted = len(result)
+            elif phase in ('generate_code', 'generate_code_stream'):
+                emitted = compiler.lines_count  # empiezan con reset()
+            else:
+                emitted = compiler.lines_count - lines
+            self.record(phase, elapsed, emitted)
+            return result
+        return timed
+    
+    def as_dict(self) -> Dict[str, Dict[str, object]]:
+        return {phase: {'llamadas': calls, 'segundos': seconds, 'lineas': lines}
+                for phase, (calls, seconds, lines) in self.phases.items()}
+    
+    def report(self) -> List[str]:
+        """Una línea por fase, de la que más tiempo tomó a la que menos"""
+        rows = sorted(self.phases.items(), key=lambda item: -item[1][1])
+        width = max((len(phase) for phase, _ in rows), default=0)
+        return [f"  {phase:<{width}}  {calls:>7} llamadas  {seconds * 1000:>9.3f} ms  "
+                f"{lines:>8} líneas"
+                for phase, (calls, seconds, lines) in rows]
+
+
+class Compilador:
+    def __init__(self, peephole: bool = False,
+                 peephole_rules: Optional[List[Tuple[str, PeepholeRule]]] = None,
+                 cse: bool = False, simplify: bool = False, registers: bool = False,
+                 prune_checks: bool = False, direct_errors: bool = False,
+                 memo_abs: bool = False, reorder: bool = False,
+                 flag_overflow: bool = False, extended_isa: bool = False,
+                 profile: bool = False):
+        self.peephole = peephole
+        self.prune_checks = prune_checks
+        self.direct_errors = direct_errors
+        self.error_checks_removed = 0
+        self.cse = cse
+        self.simplify = simplify
+        self.registers = registers
+        self.accumulator: Optional[str] = None
+        # Temporal cuyo valor está en A y todavía no se escribió (modo registros)
+        self.pending_store: Optional[str] = None
+        self.simplify_hits: Dict[str, int] = {}
+        self.peephole_rules = list(PEEPHOLE_RULES if peephole_rules is None else peephole_rules)
+        self.peephole_hits: Dict[str, int] = {}
         self.lines_count = 0
         self.memory_accesses = 0
         self.assembly_code = []
+        # Si está definido, add_instruction escribe aquí en vez de acumular en assembly_code
+        self.output: Optional[TextIO] = None
         self.variables = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
         self.temp_counter = 0
+        self.temps_requested = 0
+        self.free_temps = []
         self.op_id_counter = 0
+        self.cse_uses: Dict[int, int] = {}
+        self.cse_temps: Dict[int, str] = {}
+        self.temp_nodes: Dict[str, int] = {}
+        self.cse_hits = 0
+        self.memo_abs = memo_abs
+        self.abs_uses: Dict[str, int] = {}
+        self.abs_memo: Dict[str, str] = {}
+        self.slot_sources: Dict[str, str] = {}
+        # Valor de cada temporal que guarda una constante
+        self.constants: Dict[str, int] = {}
+        self.abs_reuses = 0
+        self.reorder = reorder
+        self.reorder_swaps = 0
+        self.scratch: Dict[str, int] = {}
+        self.flag_overflow = flag_overflow
+        # JCR, SHL y SHR no están en el conjunto de instrucciones que usan las
+        # generaciones anteriores (MOV, ADD, SUB, AND, OR, XOR, CMP, JMP, JEQ,
+        # JNE, JLT) y solo los define simulador.py: los usan el intercambio de
+        # factores de * y el código especializado para constantes, solo si se
+        # pide. Sin ellos las constantes pasan por los loops genéricos
+        self.extended_isa = extended_isa
+        # (token, primera línea, línea siguiente a la última) del código de cada
+        # token. Solo se registran con record_spans (lo activa peor_caso), para
+        # no guardar una tupla por token en cada compilación
+        self.record_spans = False
+        self.token_spans: List[Tuple[str, int, int]] = []
+        self.profile = profile
+        self.profile_stats: Optional[CompileProfile] = None
+        if profile:
+            self.instrument()
+        
+    def instrument(self) -> None:
+        """
+        Reemplaza en esta instancia cada fase medida por una versión que la
+        cronometra. Sin profile no se envuelve nada y no hay costo alguno.
+        """
+        self.profile_stats = CompileProfile()
+        phases = [name for name in dir(type(self))
+                  if name.startswith(('generate_', 'check_overflow_'))]
+        for phase in list(PROFILED_METHODS) + phases:
+            setattr(self, phase, self.profile_stats.wrap(self, phase, getattr(self, phase)))
         
     def reset(self):
         self.lines_count = 0
         self.memory_accesses = 0
         self.assembly_code = []
         self.temp_counter = 0
+        self.temps_requested = 0
+        self.free_temps = []
         self.op_id_counter = 0
+        self.peephole_hits = {}
+        self.simplify_hits = {}
+        self.accumulator = None
+        self.pending_store = None
+        self.error_checks_removed = 0
+        self.cse_uses = {}
+        self.cse_temps = {}
+        self.temp_nodes = {}
+        self.cse_hits = 0
+        self.abs_uses = {}
+        self.abs_memo = {}
+        self.slot_sources = {}
+        self.constants = {}
+        self.abs_reuses = 0
+        self.reorder_swaps = 0
+        self.token_spans = []
         
     def add_instruction(self, instruction: str):
-        self.assembly_code.append(instruction)
+        if self.output is not None:
+            if self.lines_count:
+                self.output.write("\n")
+            self.output.write(instruction)
+        else:
+            self.assembly_code.append(instruction)
         self.lines_count += 1
+        self.memory_accesses += count_memory_accesses(instruction)
     
     def get_temp_var(self) -> str:
+        """Entrega un temporal, reutilizando primero los que ya se liberaron"""
+        self.temps_requested += 1
+        if self.free_temps:
+            return f"v_temp{heapq.heappop(self.free_temps)}"
         temp = f"v_temp{self.temp_counter}"
         self.temp_counter += 1
         return temp
     
+    def free_temp_var(self, *temps: str):
+        """Libera temporales cuyo último uso ya fue emitido"""
+        for temp in temps:
+            if temp.startswith("v_temp"):
+                heapq.heappush(self.free_temps, int(temp[len("v_temp"):]))
+                self.slot_sources.pop(temp, None)
+                self.constants.pop(temp, None)
+                if temp == self.pending_store:
+                    # Nadie más lo lee: el valor no llega a escribirse
+                    self.pending_store = None
+    
+    def release_operands(self, *temps: str):
+        """
+        Libera operandos ya consumidos. Con CSE un temporal solo se libera
+        cuando se consumió el último uso de su nodo en el DAG
+        """
+        if not self.cse:
+            self.free_temp_var(*temps)
+            return
+        for temp in temps:
+            node = self.temp_nodes[temp]
+            self.cse_uses[node] -= 1
+            if self.cse_uses[node] == 0:
+                del self.cse_temps[node]
+                del self.temp_nodes[temp]
+                self.free_temp_var(temp)
+    
     def add_error_check(self):
         """Agrega verificación de error después de operaciones críticas"""
+        if self.registers:
+            # Usa B para no perder el valor que está en A
+            self.add_instruction("MOV B, (v_error)")
+            self.add_instruction("CMP B, 1")
+            self.add_instruction("JEQ error_program")
+            return
         self.add_instruction("MOV A, (v_error)")
         self.add_instruction("CMP A, 1")
         self.add_instruction("JEQ end_program")
-        self.memory_accesses += 1
+    
+    def generate_error(self, result: Optional[str]) -> List[str]:
+        """
+        Marca v_error. Por defecto deja result en 0 (y en A) y el chequeo
+        siguiente termina el programa; con direct_errors salta de inmediato a
+        end_program con A = 1 (el mismo v_result que deja el chequeo).
+        Sin result el 0 solo queda en A
+        """
+        if self.direct_errors:
+            return ["MOV A, 1", "MOV (v_error), A", "JMP end_program"]
+        if result is None:
+            return ["MOV A, 1", "MOV (v_error), A", "MOV A, 0"]
+        return ["MOV A, 1", "MOV (v_error), A", "MOV A, 0", f"MOV ({result}), A"]
+    
+    def store_result(self, slot: str):
+        """
+        Guarda A en slot. En modo registros la escritura se posterga: si el
+        que consume el valor lo toma de A, nunca se escribe
+        """
+        if self.registers:
+            self.pending_store = slot
+        else:
+            self.add_instruction(f"MOV ({slot}), A")
+        self.accumulator = slot
+    
+    def flush_pending_store(self):
+        """Escribe el resultado postergado antes de que se lea de memoria o se pierda A"""
+        if self.pending_store is not None:
+            self.add_instruction(f"MOV ({self.pending_store}), A")
+            self.pending_store = None
+    
+    def consumes_pending(self, token: str, stack: List[str]) -> bool:
+        """
+        Si token toma el resultado postergado directo de A: + y - con el flag
+        V (el chequeo por software relee los operandos de memoria), cuando es
+        uno solo de sus operandos y este es su último uso
+        """
+        pending = self.pending_store
+        if token not in ('+', '-') or not self.flag_overflow or len(stack) < 2:
+            return False
+        if pending not in stack[-2:] or stack[-1] == stack[-2]:
+            return False
+        return not self.cse or self.cse_uses[self.temp_nodes[pending]] == 1
+    
+    def load_accumulator(self, slot: str):
+        """Carga slot en A, salvo que en modo registros A ya tenga ese valor"""
+        if not (self.registers and self.accumulator == slot):
+            self.add_instruction(f"MOV A, ({slot})")
+        self.accumulator = slot
     
     def tokenize_expression(self, expression: str) -> List[str]:
-        tokens = []
-        i = 0
+        return list(self.iter_tokens(expression))
+    
+    def iter_tokens(self, characters: Iterable[str]) -> Iterator[str]:
+        """
+        Entrega los tokens a medida que se leen los caracteres, sin armar la
+        lista completa. Los chequeos de paréntesis y de expresión vacía se
+        hacen al agotarse la entrada.
+        """
         paren_count = 0
-        
-        while i < len(expression):
-            c = expression[i]
+        any_token = False
+        digits = ''
+        digits_start = 0
+        
+        for i, c in enumerate(characters):
+            if c in '0123456789':
+                if not digits:
+                    digits_start = i
+                digits += c
+                any_token = True
+                continue
+            if digits:
+                yield self.literal_token(digits, digits_start)
+                digits = ''
+            
             if c in '+-*/%()':
                 if c == '(':
                     paren_count += 1
                 elif c == ')':
                     paren_count -= 1
                     if paren_count < 0:
-                        raise Exception(f"Error: Paréntesis de cierre sin apertura en posición {i}")
-                tokens.append(c)
-                i += 1
+                        raise ExpressionError(f"Error: Paréntesis de cierre sin apertura en posición {i}")
+                any_token = True
+                yield c
             elif c in 'abcdefg':
-                tokens.append(c)
-                i += 1
-            elif c.isspace():
-                i += 1
-            else:
-                raise Exception(f"Error: Carácter no válido '{c}' en posición {i}")
+                any_token = True
+                yield c
+            elif not c.isspace():
+                raise ExpressionError(f"Error: Carácter no válido '{c}' en posición {i}")
         
-        if paren_count != 0:
-            raise Exception("Error: Paréntesis no balanceados")
+        if digits:
+            yield self.literal_token(digits, digits_start)
         
-        if not tokens:
-            raise Exception("Error: Expresión vacía")
+        if paren_count != 0:
+            raise ExpressionError("Error: Paréntesis no balanceados")
         
-        return tokens
+        if not any_token:
+            raise ExpressionError("Error: Expresión vacía")
+    
+    def literal_token(self, digits: str, position: int) -> str:
+        """Normaliza una constante ('007' -> '7'); debe caber en 8 bits con signo"""
+        value = int(digits)
+        if value > 127:
+            raise ExpressionError(f"Error: Constante fuera de rango (0 a 127) en posición {position}")
+        return str(value)
     
     def shunting_yard(self, tokens: List[str]) -> List[str]:
-        output = []
+        return list(self.iter_shunting_yard(tokens))
+    
+    def iter_shunting_yard(self, tokens: Iterable[str]) -> Iterator[str]:
+        """
+        Shunting-yard incremental: cada token postfijo se entrega apenas se
+        conoce. El signo unario solo necesita el token anterior y uno de
+        lookahead.
+        """
         operators = []
-        precedence = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2}
-        
-        i = 0
-        while i < len(tokens):
-            token = tokens[i]
-            
-            if token in self.variables:
-                output.append(token)
-            elif token in precedence:
-                if token in '+-' and (i == 0 or tokens[i-1] == '(' or tokens[i-1] in '+-*/%'):
-                    if i + 1 >= len(tokens):
-                        raise Exception(f"Error: Operador '{token}' sin operando")
-                    next_token = tokens[i + 1]
-                    if next_token not in self.variables and next_token != '(':
-                        raise Exception(f"Error: Signo unario '{token}' seguido de token inválido")
-                    if token == '-':
-                        output.append('0')
-                        operators.append('-')
-                    i += 1
-                    continue
-                
-                while (operators and operators[-1] != '(' and 
-                       precedence.get(operators[-1], 0) >= precedence[token]):
-                    output.append(operators.pop())
-                operators.append(token)
-            elif token == '(':
-                operators.append(token)
-            elif token == ')':
-                while operators and operators[-1] != '(':
-                    output.append(operators.pop())
-                if not operators:
-                    raise Exception("Error: Paréntesis de cierre sin apertura")
-                operators.pop()
+        tokens = iter(tokens)
+        previous = None
+        token = next(tokens, None)
+        while token is not None:
+            lookahead = next(tokens, None)
+            yield from self.shunting_step(token, previous, lookahead, operators)
+            previous, token = token, lookahead
+        yield from self.shunting_finish(operators)
+    
+    def shunting_step(self, token: str, previous: Optional[str], lookahead: Optional[str],
+                      operators: List[str]) -> List[str]:
+        """Procesa un token con la pila de operadores y retorna los tokens postfijos que salen"""
+        if token in self.variables or is_literal(token):
+            return [token]
+        if token in PRECEDENCE:
+            if token in '+-' and (previous is None or previous == '(' or previous in '+-*/%'):
+                if lookahead is None:
+                    raise ExpressionError(f"Error: Operador '{token}' sin operando")
+                if lookahead not in self.variables and lookahead != '(' and not is_literal(lookahead):
+                    raise ExpressionError(f"Error: Signo unario '{token}' seguido de token inválido")
+                if token == '-':
+                    operators.append('-')
+                    return ['0']
+                return []
             
-            i += 1
-        
+            output = []
+            while (operators and operators[-1] != '(' and 
+                   PRECEDENCE.get(operators[-1], 0) >= PRECEDENCE[token]):
+                output.append(operators.pop())
+            operators.append(token)
+            return output
+        if token == '(':
+            operators.append(token)
+        elif token == ')':
+            output = []
+            while operators and operators[-1] != '(':
+                output.append(operators.pop())
+            if not operators:
+                raise ExpressionError("Error: Paréntesis de cierre sin apertura")
+            operators.pop()
+            return output
+        return []
+    
+    def shunting_finish(self, operators: List[str]) -> List[str]:
+        """Vacía la pila de operadores al terminar la entrada"""
+        output = []
         while operators:
             if operators[-1] == '(':
-                raise Exception("Error: Paréntesis de apertura sin cierre")
+                raise ExpressionError("Error: Paréntesis de apertura sin cierre")
             output.append(operators.pop())
+        return output
+
+    def build_dag(self, postfix: List[str]) -> Tuple[List[int], Dict[int, int]]:
+        """
+        Convierte la postfija en un DAG con hash-consing: cada nodo se
+        identifica por (operador, operandos) y en + y * los operandos se
+        ordenan, así a*b y b*a son el mismo nodo.
+        Retorna el nodo de cada token y cuántas veces se usa cada nodo como operando.
+        """
+        table: Dict[Tuple, int] = {}
+        uses: Dict[int, int] = {}
+        nodes = []
+        stack = []
         
+        for token in postfix:
+            count = arity(token)
+            if len(stack) < count:
+                raise ExpressionError(f"Error: Operador '{token}' sin operandos suficientes")
+            operands = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            if token in COMMUTATIVE_OPERATORS:
+                operands.sort()
+            for operand in operands:
+                uses[operand] += 1
+            key = (token, *operands)
+            
+            node = table.setdefault(key, len(table))
+            uses.setdefault(node, 0)
+            nodes.append(node)
+            stack.append(node)
+        
+        return nodes, uses
+
+    def simplify_node(self, node):
+        """
+        Reescribe un nodo cuyos hijos ya están simplificados.
+        Mantiene los casos de overflow y de v_error de la expresión original.
+        """
+        op = node[0]
+        if op == '-' and node[1] == '0':
+            self.count_simplification("0 - x")
+            return self.simplify_node(('neg', node[2]))
+        if op == '-' and node[1] == node[2]:
+            self.count_simplification("x - x")
+            return self.simplify_node(('zero_of', node[1]))
+        if op in ('+', '-') and node[2] == '0':
+            self.count_simplification("x + 0")
+            return node[1]
+        if op == '+' and node[1] == '0':
+            self.count_simplification("x + 0")
+            return node[2]
+        if op == '%' and node[1] == node[2]:
+            self.count_simplification("x % x")
+            return ('chk_zero', node[1])
+        if op in ('neg', 'chk_min') and node[1] == '0':
+            return '0'
+        if op == 'neg' and not isinstance(node[1], str) and node[1][0] == 'neg':
+            # -(-x) solo falla si x = -128
+            self.count_simplification("-(-x)")
+            return self.simplify_node(('chk_min', node[1][1]))
+        if op in ('neg', 'chk_min') and not isinstance(node[1], str) and node[1][0] == 'chk_min':
+            return self.simplify_node((op, node[1][1]))
+        if op == 'chk_min' and not isinstance(node[1], str) and node[1][0] == 'neg':
+            # -x nunca vale -128 sin haber fallado antes
+            return node[1]
+        if op == 'zero_of' and isinstance(node[1], str):
+            # Cargar una variable no puede fallar
+            return '0'
+        return node
+    
+    def count_simplification(self, rule: str):
+        self.simplify_hits[rule] = self.simplify_hits.get(rule, 0) + 1
+    
+    def simplify_postfix(self, postfix: List[str]) -> List[str]:
+        """Arma el árbol desde la postfija simplificando cada nodo, y lo vuelve a aplanar"""
+        stack = []
+        for token in postfix:
+            count = arity(token)
+            if len(stack) < count:
+                raise ExpressionError(f"Error: Operador '{token}' sin operandos suficientes")
+            if count == 0:
+                stack.append(token)
+                continue
+            operands = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            stack.append(self.simplify_node((token, *operands)))
+        
+        if len(stack) != 1:
+            raise ExpressionError("Error: Expresión inválida - resultado no único")
+        
+        output = []
+        pending = [(stack[0], False)]
+        while pending:
+            node, expanded = pending.pop()
+            if isinstance(node, str):
+                output.append(node)
+            elif expanded:
+                output.append(node[0])
+            else:
+                pending.append((node, True))
+                for child in reversed(node[1:]):
+                    pending.append((child, False))
+        return output
+
+    def scratch_temps(self, token: str) -> int:
+        """Máximo de temporales propios que tiene vivos el código de un operador"""
+        if token not in self.scratch:
+            events = TempRecorder().record(token)
+            live = peak = 0
+            for kind, _ in events:
+                if kind == 'get':
+                    live += 1
+                    peak = max(peak, live)
+                elif kind == 'free':
+                    live -= 1
+            self.scratch[token] = peak
+        return self.scratch[token]
+    
+    def order_evaluation(self, postfix: List[str]) -> List[str]:
+        """
+        Orden de evaluación de Sethi-Ullman: etiqueta cada subárbol con los
+        temporales que necesita y evalúa primero el hijo más costoso, para
+        que haya menos resultados intermedios vivos a la vez. Para -, / y %
+        el orden invertido se marca con su variante de REVERSED_OPERATORS;
+        en caso de empate se mantiene el orden del fuente.
+        """
+        # Cada entrada: (nodo en orden de emisión, temporales necesarios, temporales que ocupa el resultado)
+        stack = []
+        for token in postfix:
+            count = arity(token)
+            if len(stack) < count:
+                raise ExpressionError(f"Error: Operador '{token}' sin operandos suficientes")
+            if count == 0:
+                hold = 0 if self.registers and token in self.variables else 1
+                stack.append((token, hold, hold))
+            elif count == 1:
+                child, need, hold = stack.pop()
+                stack.append(((token, child), max(need, hold + self.scratch_temps(token)), 1))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                working = left[2] + right[2] + self.scratch_temps(token)
+                in_order = max(left[1], left[2] + right[1], working)
+                swapped = max(right[1], right[2] + left[1], working)
+                if swapped < in_order:
+                    self.reorder_swaps += 1
+                    if token not in COMMUTATIVE_OPERATORS:
+                        token = next(r for r, op in REVERSED_OPERATORS.items() if op == token)
+                    stack.append(((token, right[0], left[0]), swapped, 1))
+                else:
+                    stack.append(((token, left[0], right[0]), in_order, 1))
+        
+        if len(stack) != 1:
+            raise ExpressionError("Error: Expresión inválida - resultado no único")
+        
+        output = []
+        pending = [(stack[0][0], False)]
+        while pending:
+            node, expanded = pending.pop()
+            if isinstance(node, str):
+                output.append(node)
+            elif expanded:
+                output.append(node[0])
+            else:
+                pending.append((node, True))
+                for child in reversed(node[1:]):
+                    pending.append((child, False))
         return output
 
     def generate_absolute_value(self, source: str, result: str) -> List[str]:
@@ -143,6 +650,109 @@ class Compilador:
         
         code.append(f"abs_end_{op_id}:")
         return code
+    
+    def absolute_value(self, source: str, result: str,
+                       modified: bool = True) -> Tuple[List[str], str]:
+        """
+        Calcula |source| y retorna (código, slot donde quedó). Sin memo_abs el
+        slot es result. Con memo_abs el valor absoluto de cada variable, y con
+        CSE de cada nodo compartido del DAG, se guarda en un temporal que vive
+        hasta su último uso (ni las variables ni el temporal de un nodo se
+        sobrescriben mientras quedan usos, así que sigue vigente): si el
+        consumidor lo modifica (modified) se copia a result, si solo lo lee se
+        usa directo
+        """
+        if not self.memo_abs:
+            return self.generate_absolute_value(source, result), result
+        
+        source = self.slot_sources.get(source, source)
+        key = self.abs_key(source)
+        memo = self.abs_memo.get(key)
+        code = []
+        if memo is not None:
+            self.abs_reuses += 1
+        elif self.abs_uses.get(key, 0) > 1:
+            memo = self.get_temp_var()
+            self.abs_memo[key] = memo
+            code = self.generate_absolute_value(source, memo)
+        else:
+            code = self.generate_absolute_value(source, result)
+        
+        slot = result
+        if memo is not None:
+            if modified:
+                code += [f"MOV A, ({memo})", f"MOV ({result}), A"]
+            else:
+                slot = memo
+        
+        if key in self.abs_uses:
+            self.abs_uses[key] -= 1
+            if self.abs_uses[key] == 0 and memo is not None:
+                # Los helpers piden sus temporales antes de los valores absolutos,
+                # así que nada más de esta operación puede reutilizarlo
+                del self.abs_memo[key]
+                self.free_temp_var(memo)
+        return code, slot
+    
+    def abs_shared(self, source: str) -> bool:
+        """Si el valor absoluto de source está (o estará) memorizado en un temporal"""
+        key = self.abs_key(source)
+        return key in self.abs_memo or self.abs_uses.get(key, 0) > 1
+    
+    def abs_key(self, slot: str) -> str:
+        """
+        Valor que guarda slot para el memo de valores absolutos: la variable
+        copiada en él, con CSE el nodo del DAG de su temporal, o el slot mismo
+        """
+        if slot in self.slot_sources:
+            return self.slot_sources[slot]
+        if slot.startswith("v_temp") and slot in self.temp_nodes:
+            return f"node{self.temp_nodes[slot]}"
+        return slot
+    
+    def count_abs_uses(self, postfix: List[str], nodes: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Cuántas veces se calcula el valor absoluto de cada variable y, con CSE,
+        de cada nodo del DAG (operandos directos de *, / y %), con las mismas
+        claves que abs_key. Con CSE solo cuenta la primera aparición de cada
+        nodo, que es la única que genera código
+        """
+        uses: Dict[str, int] = {}
+        stack: List[Optional[str]] = []
+        seen = set()
+        for index, token in enumerate(postfix):
+            operands = stack[len(stack) - arity(token):]
+            del stack[len(stack) - arity(token):]
+            generated = nodes is None or nodes[index] not in seen
+            if nodes is not None:
+                seen.add(nodes[index])
+            op = REVERSED_OPERATORS.get(token, token)
+            if generated and op in ('*', '/', '%'):
+                if token in REVERSED_OPERATORS:
+                    operands.reverse()
+                for source in self.abs_operands(op, *operands):
+                    uses[source] = uses.get(source, 0) + 1
+            if token in self.variables:
+                stack.append(f"v_{token}")
+            elif is_literal(token):
+                stack.append(token)
+            else:
+                stack.append(None if nodes is None else f"node{nodes[index]}")
+        return uses
+    
+    def abs_operands(self, op: str, left: Optional[str], right: Optional[str]) -> List[str]:
+        """Variables o nodos cuyo valor absoluto calcula el código de left op right"""
+        if self.extended_isa and right is not None and is_literal(right):
+            value = int(right)
+            # Con divisor constante solo la división por restas o SHR usa |left|
+            uses_abs = value >= 2 if op == '/' else value > 0 and not is_power_of_two(value)
+            if op == '*' or not uses_abs:
+                return []
+            right = None
+        elif self.extended_isa and op == '*' and left is not None and is_literal(left):
+            return []
+        return [source for source in (left, right)
+                if source is not None and not is_literal(source)]
 
     def check_overflow_addition(self, op1: str, op2: str, result_temp: str) -> List[str]:
         """Verifica overflow en suma"""
@@ -182,10 +792,7 @@ class Compilador:
         code.append(f"JMP no_overflow_{op_id}")
         
         code.append(f"overflow_detected_{op_id}:")
-        code.append(f"MOV A, 1")
-        code.append(f"MOV (v_error), A")
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
+        code.extend(self.generate_error(result_temp))
         
         code.append(f"no_overflow_{op_id}:")
         return code
@@ -226,16 +833,83 @@ class Compilador:
         code.append(f"JMP no_overflow_{op_id}")
         
         code.append(f"overflow_detected_{op_id}:")
-        code.append(f"MOV A, 1")
-        code.append(f"MOV (v_error), A")
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
+        code.extend(self.generate_error(result_temp))
         
         code.append(f"no_overflow_{op_id}:")
         return code
 
+    def check_overflow_flag(self, result_temp: str) -> List[str]:
+        """
+        Verifica overflow de suma o resta con el flag V del ADD/SUB recién
+        emitido. Supone JOV (salta con V = 1) y que el MOV que guarda el
+        resultado no modifica los flags, como en simulador.py; las
+        generaciones anteriores no los usan, por eso solo con flag_overflow
+        """
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        
+        code = []
+        code.append(f"JOV overflow_detected_{op_id}")
+        code.append(f"JMP no_overflow_{op_id}")
+        
+        code.append(f"overflow_detected_{op_id}:")
+        # Con el resultado postergado el 0 del error queda en A, como el valor normal
+        code.extend(self.generate_error(None if self.pending_store == result_temp else result_temp))
+        
+        code.append(f"no_overflow_{op_id}:")
+        return code
+
+    def generate_negation(self, source: str, result: str) -> List[str]:
+        """Negación en complemento a 2: -(-128) no cabe y marca overflow"""
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        
+        code = []
+        code.append(f"MOV A, ({source})")
+        code.append(f"CMP A, 128")
+        code.append(f"JEQ neg_overflow_{op_id}")
+        code.append(f"XOR A, 255")
+        code.append(f"ADD A, 1")
+        code.append(f"MOV ({result}), A")
+        code.append(f"JMP neg_end_{op_id}")
+        
+        code.append(f"neg_overflow_{op_id}:")
+        code.extend(self.generate_error(result))
+        
+        code.append(f"neg_end_{op_id}:")
+        return code
+
+    def generate_value_check(self, source: str, result: str, value: int,
+                             result_value: Optional[int] = None) -> List[str]:
+        """
+        Marca error si source vale value. Si no, copia source en result
+        (o result_value si se indica)
+        """
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        
+        code = []
+        code.append(f"MOV A, ({source})")
+        code.append(f"CMP A, {value}")
+        code.append(f"JEQ check_error_{op_id}")
+        if result_value is not None:
+            code.append(f"MOV A, {result_value}")
+        code.append(f"MOV ({result}), A")
+        code.append(f"JMP check_end_{op_id}")
+        
+        code.append(f"check_error_{op_id}:")
+        code.extend(self.generate_error(result))
+        
+        code.append(f"check_end_{op_id}:")
+        return code
+
     def generate_multiplication_signed(self, var1: str, var2: str) -> List[str]:
         """Multiplicación con signo usando valores absolutos"""
+        # El multiplicando se desplaza en su lugar y el multiplicador solo se
+        # lee: un valor absoluto memorizado sirve sin copia como multiplicador
+        if self.memo_abs and self.abs_shared(f"v_{var1}") and not self.abs_shared(f"v_{var2}"):
+            var1, var2 = var2, var1
+        
         op_id = self.op_id_counter
         self.op_id_counter += 1
         
@@ -245,6 +919,7 @@ class Compilador:
         sign_temp = self.get_temp_var()
         abs1_temp = self.get_temp_var()
         abs2_temp = self.get_temp_var()
+        mask_temp = self.get_temp_var()
         
         # Determinar signo del resultado
         code.append(f"MOV A, (v_{var1})")
@@ -255,45 +930,82 @@ class Compilador:
         code.append(f"MOV ({sign_temp}), A")
         
         # Calcular valores absolutos
-        abs_code1 = self.generate_absolute_value(f"v_{var1}", abs1_temp)
+        abs_code1, _ = self.absolute_value(f"v_{var1}", abs1_temp)
         code.extend(abs_code1)
         
-        abs_code2 = self.generate_absolute_value(f"v_{var2}", abs2_temp)
+        abs_code2, abs2_slot = self.absolute_value(f"v_{var2}", abs2_temp, modified=False)
         code.extend(abs_code2)
         
-        # Multiplicación de valores absolutos
+        # Multiplicación binaria (desplazamiento y suma): recorre los bits de
+        # |var2| (con extended_isa, del menor de |var1| y |var2|) desde el menos
+        # significativo, a lo más 8 iteraciones (4 con el menor como contador)
+        # antes de terminar o desbordar. counter guarda los bits que faltan,
+        # abs1 se duplica en cada paso
         code.append(f"MOV A, 0")
         code.append(f"MOV ({result_temp}), A")
-        code.append(f"MOV A, ({abs2_temp})")
+        code.append(f"MOV A, 1")
+        code.append(f"MOV ({mask_temp}), A")
+        code.append(f"MOV A, ({abs2_slot})")
         code.append(f"MOV ({counter_temp}), A")
         
+        if self.extended_isa:
+            # Si abs1 < abs2 se intercambian (sin signo, |-128| = 128: JCR salta
+            # con el préstamo del CMP); abs2 solo se lee, así que el intercambio
+            # pasa por abs1, que es propio
+            code.append(f"CMP A, ({abs1_temp})")
+            code.append(f"JCR loop_mul_{op_id}")
+            code.append(f"JEQ loop_mul_{op_id}")
+            code.append(f"MOV B, A")
+            code.append(f"MOV A, ({abs1_temp})")
+            code.append(f"MOV ({counter_temp}), A")
+            code.append(f"MOV A, B")
+            code.append(f"MOV ({abs1_temp}), A")
+        
         code.append(f"loop_mul_{op_id}:")
         code.append(f"MOV A, ({counter_temp})")
         code.append(f"CMP A, 0")
         code.append(f"JEQ end_mul_{op_id}")
         
-        code.append(f"MOV A, ({result_temp})")
-        code.append(f"ADD A, ({abs1_temp})")
-        
-        # Verificar overflow
+        # Si abs1 desplazado ya no cabe y quedan bits, el producto desborda
+        code.append(f"MOV A, ({abs1_temp})")
         code.append(f"AND A, 128")
         code.append(f"CMP A, 128")
         code.append(f"JEQ overflow_mul_{op_id}")
         
+        code.append(f"MOV A, ({counter_temp})")
+        code.append(f"MOV B, ({mask_temp})")
+        code.append(f"AND A, B")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ shift_mul_{op_id}")
+        
+        # Bit encendido: quitarlo de counter y sumar abs1 al resultado
+        code.append(f"MOV A, ({counter_temp})")
+        code.append(f"SUB A, B")
+        code.append(f"MOV ({counter_temp}), A")
+        
         code.append(f"MOV A, ({result_temp})")
         code.append(f"ADD A, ({abs1_temp})")
         code.append(f"MOV ({result_temp}), A")
         
-        code.append(f"MOV A, ({counter_temp})")
-        code.append(f"SUB A, 1")
-        code.append(f"MOV ({counter_temp}), A")
+        # Verificar overflow
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 128")
+        code.append(f"JEQ overflow_mul_{op_id}")
+        
+        # Duplicar abs1 y la máscara
+        code.append(f"shift_mul_{op_id}:")
+        code.append(f"MOV A, ({abs1_temp})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({abs1_temp}), A")
+        code.append(f"MOV A, ({mask_temp})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({mask_temp}), A")
         code.append(f"JMP loop_mul_{op_id}")
         
         code.append(f"overflow_mul_{op_id}:")
-        code.append(f"MOV A, 1")
-        code.append(f"MOV (v_error), A")
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
+        code.extend(self.generate_error(result_temp))
         code.append(f"JMP end_mul_{op_id}")
         
         code.append(f"end_mul_{op_id}:")
@@ -316,6 +1028,96 @@ class Compilador:
         code.append(f"MOV A, ({result_temp})")
         
         code.append(f"skip_sign_{op_id}:")
+        self.free_temp_var(result_temp, counter_temp, sign_temp, abs1_temp, abs2_temp, mask_temp)
+        return code
+
+    def generate_unsigned_division(self, dividend: str, divisor: str, remainder: str,
+                                   counter: str, prefix: str, op_id: int,
+                                   end_label: str) -> List[str]:
+        """
+        División binaria con restauración para valores sin signo
+        (dividendo 0..128, divisor 1..128). Los bits del cociente entran por
+        la derecha del dividendo a medida que se desplaza, así que al llegar
+        a end_label el dividendo contiene el cociente y remainder el resto.
+        """
+        code = []
+        # Si dividendo < divisor el cociente es 0 y el resto el dividendo
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"MOV ({remainder}), A")
+        code.append(f"MOV B, ({divisor})")
+        code.append(f"CMP A, B")
+        code.append(f"JLT {prefix}_small_{op_id}")
+        
+        code.append(f"MOV A, 0")
+        code.append(f"MOV ({remainder}), A")
+        code.append(f"MOV A, 8")
+        code.append(f"MOV ({counter}), A")
+        
+        # Saltar los ceros iniciales del dividendo (no cambian resto ni cociente)
+        code.append(f"{prefix}_norm_{op_id}:")
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 0")
+        code.append(f"JNE {prefix}_loop_{op_id}")
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({dividend}), A")
+        code.append(f"MOV A, ({counter})")
+        code.append(f"SUB A, 1")
+        code.append(f"MOV ({counter}), A")
+        code.append(f"JMP {prefix}_norm_{op_id}")
+        
+        # Un bit del dividendo por iteración, a lo más 8
+        code.append(f"{prefix}_loop_{op_id}:")
+        code.append(f"MOV A, ({counter})")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ {end_label}")
+        code.append(f"SUB A, 1")
+        code.append(f"MOV ({counter}), A")
+        
+        # resto = 2 * resto + bit más significativo del dividendo
+        code.append(f"MOV A, ({remainder})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({remainder}), A")
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ {prefix}_shift_{op_id}")
+        code.append(f"MOV A, ({remainder})")
+        code.append(f"ADD A, 1")
+        code.append(f"MOV ({remainder}), A")
+        
+        code.append(f"{prefix}_shift_{op_id}:")
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"MOV B, A")
+        code.append(f"ADD A, B")
+        code.append(f"MOV ({dividend}), A")
+        
+        # Si resto >= divisor se resta y el bit del cociente es 1.
+        # Un resto >= 128 siempre supera al divisor (y no se puede comparar con signo)
+        code.append(f"MOV A, ({remainder})")
+        code.append(f"MOV B, ({divisor})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 128")
+        code.append(f"JEQ {prefix}_sub_{op_id}")
+        code.append(f"MOV A, ({remainder})")
+        code.append(f"CMP A, B")
+        code.append(f"JLT {prefix}_loop_{op_id}")
+        
+        code.append(f"{prefix}_sub_{op_id}:")
+        code.append(f"MOV A, ({remainder})")
+        code.append(f"SUB A, B")
+        code.append(f"MOV ({remainder}), A")
+        code.append(f"MOV A, ({dividend})")
+        code.append(f"ADD A, 1")
+        code.append(f"MOV ({dividend}), A")
+        code.append(f"JMP {prefix}_loop_{op_id}")
+        
+        code.append(f"{prefix}_small_{op_id}:")
+        code.append(f"MOV A, 0")
+        code.append(f"MOV ({dividend}), A")
         return code
 
     def generate_division_signed(self, var1: str, var2: str) -> List[str]:
@@ -329,6 +1131,7 @@ class Compilador:
         sign_temp = self.get_temp_var()
         abs1_temp = self.get_temp_var()
         abs2_temp = self.get_temp_var()
+        counter_temp = self.get_temp_var()
         
         # Verificar división por cero
         code.append(f"MOV A, (v_{var2})")
@@ -344,33 +1147,21 @@ class Compilador:
         code.append(f"MOV ({sign_temp}), A")
         
         # Calcular valores absolutos
-        abs_code1 = self.generate_absolute_value(f"v_{var1}", abs1_temp)
+        abs_code1, _ = self.absolute_value(f"v_{var1}", abs1_temp)
         code.extend(abs_code1)
         
-        abs_code2 = self.generate_absolute_value(f"v_{var2}", abs2_temp)
+        abs_code2, abs2_slot = self.absolute_value(f"v_{var2}", abs2_temp, modified=False)
         code.extend(abs_code2)
         
-        # División de valores absolutos
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
-        code.append(f"MOV A, ({abs1_temp})")
-        code.append(f"MOV ({remainder_temp}), A")
-        
-        code.append(f"div_loop_{op_id}:")
-        code.append(f"MOV A, ({remainder_temp})")
-        code.append(f"MOV B, ({abs2_temp})")
-        code.append(f"CMP A, B")
-        code.append(f"JLT div_end_{op_id}")
-        
-        code.append(f"SUB A, B")
-        code.append(f"MOV ({remainder_temp}), A")
-        
-        code.append(f"MOV A, ({result_temp})")
-        code.append(f"ADD A, 1")
-        code.append(f"MOV ({result_temp}), A")
-        code.append(f"JMP div_loop_{op_id}")
+        # División binaria de valores absolutos (el cociente queda en abs1)
+        division_code = self.generate_unsigned_division(
+            abs1_temp, abs2_slot, remainder_temp, counter_temp,
+            "div", op_id, f"div_end_{op_id}")
+        code.extend(division_code)
         
         code.append(f"div_end_{op_id}:")
+        code.append(f"MOV A, ({abs1_temp})")
+        code.append(f"MOV ({result_temp}), A")
         
         # Aplicar signo si no hay error
         code.append(f"MOV A, (v_error)")
@@ -391,12 +1182,11 @@ class Compilador:
         code.append(f"JMP div_done_{op_id}")
         
         code.append(f"div_error_{op_id}:")
-        code.append(f"MOV A, 1")
-        code.append(f"MOV (v_error), A")
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
+        code.extend(self.generate_error(result_temp))
         
         code.append(f"div_done_{op_id}:")
+        self.free_temp_var(result_temp, remainder_temp, sign_temp, abs1_temp, abs2_temp,
+                           counter_temp)
         return code
 
     def generate_modulo_signed(self, var1: str, var2: str) -> List[str]:
@@ -407,255 +1197,1144 @@ class Compilador:
         code = []
         result_temp = self.get_temp_var()
         abs2_temp = self.get_temp_var()
+        abs1_temp = self.get_temp_var()
+        counter_temp = self.get_temp_var()
         
         # Verificar módulo por cero
         code.append(f"MOV A, (v_{var2})")
         code.append(f"CMP A, 0")
         code.append(f"JEQ mod_error_{op_id}")
         
-        # Calcular valor absoluto del divisor
-        abs_code = self.generate_absolute_value(f"v_{var2}", abs2_temp)
-        code.extend(abs_code)
+        # Calcular valores absolutos
+        abs_code1, _ = self.absolute_value(f"v_{var1}", abs1_temp)
+        code.extend(abs_code1)
         
-        # Calcular módulo
-        code.append(f"MOV A, (v_{var1})")
-        code.append(f"MOV ({result_temp}), A")
+        abs_code2, abs2_slot = self.absolute_value(f"v_{var2}", abs2_temp, modified=False)
+        code.extend(abs_code2)
         
-        # Si es negativo, hacerlo positivo sumando múltiplos del divisor
-        code.append(f"mod_adjust_{op_id}:")
-        code.append(f"MOV A, ({result_temp})")
-        code.append(f"AND A, 128")
-        code.append(f"CMP A, 128")
-        code.append(f"JNE mod_calc_{op_id}")
-        code.append(f"MOV A, ({result_temp})")
-        code.append(f"ADD A, ({abs2_temp})")
-        code.append(f"MOV ({result_temp}), A")
-        code.append(f"JMP mod_adjust_{op_id}")
+        # Resto de |var1| / |var2| con división binaria
+        division_code = self.generate_unsigned_division(
+            abs1_temp, abs2_slot, result_temp, counter_temp,
+            "mod", op_id, f"mod_calc_{op_id}")
+        code.extend(division_code)
         
-        # Calcular módulo por resta repetida
+        # Si var1 es negativo y el resto no es 0, el resultado es |var2| - resto
         code.append(f"mod_calc_{op_id}:")
+        code.append(f"MOV A, (v_{var1})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ mod_done_{op_id}")
         code.append(f"MOV A, ({result_temp})")
-        code.append(f"MOV B, ({abs2_temp})")
-        code.append(f"CMP A, B")
-        code.append(f"JLT mod_done_{op_id}")
-        
-        code.append(f"SUB A, B")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ mod_done_{op_id}")
+        code.append(f"MOV A, ({abs2_slot})")
+        code.append(f"SUB A, ({result_temp})")
         code.append(f"MOV ({result_temp}), A")
-        code.append(f"JMP mod_calc_{op_id}")
         
         code.append(f"mod_done_{op_id}:")
         code.append(f"MOV A, ({result_temp})")
         code.append(f"JMP mod_end_{op_id}")
         
         code.append(f"mod_error_{op_id}:")
-        code.append(f"MOV A, 1")
-        code.append(f"MOV (v_error), A")
-        code.append(f"MOV A, 0")
-        code.append(f"MOV ({result_temp}), A")
+        code.extend(self.generate_error(result_temp))
         
         code.append(f"mod_end_{op_id}:")
+        self.free_temp_var(result_temp, abs2_temp, abs1_temp, counter_temp)
         return code
     
-    def compile_postfix(self, postfix: List[str]) -> None:
+    def push_constant(self, token: str, stack: List[str], store: bool = True) -> None:
+        """
+        Constante: no puede fallar. Sin store no se escribe en su temporal;
+        solo sirve cuando el que la consume es un operador con código
+        especializado, que usa el valor y nunca lee el temporal
+        """
+        temp = self.get_temp_var()
+        if store:
+            self.add_instruction(f"MOV A, {token}")
+            self.store_result(temp)
+        stack.append(temp)
+        self.constants[temp] = int(token)
+    
+    def constant_operand(self, token: str, stack: List[str]) -> Optional[Tuple[str, int]]:
+        """
+        (slot del otro operando, valor) si el operador tiene un operando
+        constante que permite especializarlo: el divisor en / y %, cualquiera
+        de los dos en *. El código especializado usa JCR, SHL y SHR, así que
+        solo con extended_isa
+        """
+        if not self.extended_isa or len(stack) < 2:
+            return None
+        op1, op2 = stack[-2], stack[-1]
+        if op2 in self.constants:
+            return op1, self.constants[op2]
+        if token == '*' and op1 in self.constants:
+            return op2, self.constants[op1]
+        return None
+    
+    def generate_multiplication_constant(self, source: str, value: int, result: str) -> List[str]:
+        """
+        source * value con 0 <= value <= 127. El rango se verifica antes de
+        multiplicar: el producto cabe en 8 bits si y solo si
+        |source| <= 127 // value, es decir source + L está entre 0 y 2L sin
+        signo (L = 127 // value). Luego se multiplica con una cadena de SHL y
+        ADD sobre los bits de value, del más significativo al menos.
+        """
+        if value == 0:
+            return ["MOV A, 0", f"MOV ({result}), A"]
+        
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        limit = 127 // value
+        
+        code = []
+        code.append(f"MOV A, ({source})")
+        code.append(f"ADD A, {limit}")
+        code.append(f"CMP A, {2 * limit + 1}")
+        code.append(f"JCR mulc_ok_{op_id}")
+        code.extend(self.generate_error(result))
+        code.append(f"JMP mulc_end_{op_id}")
+        
+        code.append(f"mulc_ok_{op_id}:")
+        code.append(f"SUB A, {limit}")
+        for bit in bin(value)[3:]:
+            code.append("SHL A")
+            if bit == '1':
+                code.append(f"ADD A, ({source})")
+        code.append(f"MOV ({result}), A")
+        
+        code.append(f"mulc_end_{op_id}:")
+        return code
+    
+    def constant_division_steps(self, value: int, prefix: str, quotient: bool) -> List[str]:
+        """
+        División sin signo de A (0 a 128) por value con restas desenrolladas
+        de value * 2^i: deja el resto en A y, con quotient, el cociente en B
+        """
+        shift = 0
+        while value << (shift + 1) <= 128:
+            shift += 1
+        
+        code = []
+        for i in range(shift, -1, -1):
+            op_id = self.op_id_counter
+            self.op_id_counter += 1
+            code.append(f"CMP A, {value << i}")
+            code.append(f"JCR {prefix}_step_{op_id}")
+            code.append(f"SUB A, {value << i}")
+            if quotient:
+                code.append(f"ADD B, {1 << i}")
+            code.append(f"{prefix}_step_{op_id}:")
+        return code
+    
+    def absolute_value_in_a(self, source: str, result: str) -> List[str]:
+        """|source| en A (y en result, salvo que se reutilice el memorizado)"""
+        code, slot = self.absolute_value(source, result, modified=False)
+        if slot != result:
+            code = code + [f"MOV A, ({slot})"]
+        return code
+    
+    def generate_division_constant(self, source: str, value: int, result: str) -> List[str]:
+        """
+        source / value con value constante: una potencia de 2 se reduce a SHR
+        sobre |source| y el resto de los divisores a restas desenrolladas. El
+        cociente trunca hacia cero, como generate_division_signed.
+        """
+        if value == 0:
+            return self.generate_error(result)
+        if value == 1:
+            return [f"MOV A, ({source})", f"MOV ({result}), A"]
+        
+        code = self.absolute_value_in_a(source, result)
+        if is_power_of_two(value):
+            code.extend(["SHR A"] * (value.bit_length() - 1))
+        else:
+            code.append("MOV B, 0")
+            code.extend(self.constant_division_steps(value, "divc", quotient=True))
+            code.append("MOV A, B")
+        
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        code.append(f"MOV ({result}), A")
+        code.append(f"MOV A, ({source})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ divc_positive_{op_id}")
+        
+        code.append(f"MOV A, ({result})")
+        code.append(f"XOR A, 255")
+        code.append(f"ADD A, 1")
+        code.append(f"MOV ({result}), A")
+        code.append(f"JMP divc_end_{op_id}")
+        
+        code.append(f"divc_positive_{op_id}:")
+        code.append(f"MOV A, ({result})")
+        
+        code.append(f"divc_end_{op_id}:")
+        return code
+    
+    def generate_modulo_constant(self, source: str, value: int, result: str) -> List[str]:
+        """
+        source % value con value constante y el resultado de modelo_modulo
+        (signo del divisor). Una potencia de 2 es una máscara sobre el
+        complemento a 2; el resto de los divisores usa restas desenrolladas
+        sobre |source| y, si source es negativo, value - resto.
+        """
+        if value == 0:
+            return self.generate_error(result)
+        if is_power_of_two(value):
+            return [f"MOV A, ({source})", f"AND A, {value - 1}", f"MOV ({result}), A"]
+        
+        code = self.absolute_value_in_a(source, result)
+        code.extend(self.constant_division_steps(value, "modc", quotient=False))
+        
+        op_id = self.op_id_counter
+        self.op_id_counter += 1
+        code.append(f"MOV ({result}), A")
+        code.append(f"MOV A, ({source})")
+        code.append(f"AND A, 128")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ modc_positive_{op_id}")
+        
+        code.append(f"MOV A, ({result})")
+        code.append(f"CMP A, 0")
+        code.append(f"JEQ modc_end_{op_id}")
+        code.append(f"MOV A, {value}")
+        code.append(f"SUB A, ({result})")
+        code.append(f"MOV ({result}), A")
+        code.append(f"JMP modc_end_{op_id}")
+        
+        code.append(f"modc_positive_{op_id}:")
+        code.append(f"MOV A, ({result})")
+        
+        code.append(f"modc_end_{op_id}:")
+        return code
+    
+    def compile_postfix(self, postfix: Iterable[str]) -> None:
         stack = []
+        nodes = None
+        if self.cse or self.memo_abs:
+            # El DAG y el conteo de valores absolutos necesitan la expresión completa
+            postfix = list(postfix)
+        if self.cse:
+            nodes, self.cse_uses = self.build_dag(postfix)
+        if self.memo_abs:
+            self.abs_uses = self.count_abs_uses(postfix, nodes)
+        
+        index = -1
+        for index, (token, following) in enumerate(with_lookahead(postfix)):
+            if self.cse:
+                node = nodes[index]
+                if node in self.cse_temps:
+                    # Subexpresión ya calculada: reutilizar su temporal
+                    operands = [stack.pop() for _ in range(arity(token))]
+                    self.release_operands(*operands)
+                    stack.append(self.cse_temps[node])
+                    if operands:
+                        self.cse_hits += 1
+                    continue
+            
+            start = self.lines_count
+            if (self.extended_isa and is_literal(token) and following in ('*', '/', '%') and
+                    not (self.cse and self.cse_uses[nodes[index]] > 1)):
+                # La consume el operador siguiente como divisor o factor constante
+                self.push_constant(token, stack, store=False)
+            else:
+                self.compile_token(token, stack)
+            if self.record_spans:
+                self.token_spans.append((token, start, self.lines_count))
+            
+            if self.cse:
+                self.cse_temps[node] = stack[-1]
+                self.temp_nodes[stack[-1]] = node
         
-        for token in postfix:
-            if token in self.variables:
-                # Cargar variable
-                self.add_instruction(f"MOV A, (v_{token})")
-                self.memory_accesses += 1
-                temp = self.get_temp_var()
-                self.add_instruction(f"MOV ({temp}), A")
-                self.memory_accesses += 1
-                stack.append(temp)
-                self.add_error_check()
-                
-            elif token == '0':
-                # Constante cero
-                temp = self.get_temp_var()
+        if index < 0:
+            raise ExpressionError("Error: No hay operandos en la expresión")
+        if len(stack) != 1:
+            raise ExpressionError("Error: Expresión inválida - resultado no único")
+        
+        # El resultado final está en el stack
+        result = stack[0]
+        self.load_accumulator(result)
+    
+    def compile_token(self, token: str, stack: List[str]) -> None:
+        """Genera el código de un token postfijo, operando sobre la pila de slots"""
+        if token in REVERSED_OPERATORS and len(stack) >= 2:
+            # Los operandos se evaluaron en orden inverso: restaurar su posición
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+            token = REVERSED_OPERATORS[token]
+        
+        if self.pending_store is not None and not (
+                token in self.variables or self.consumes_pending(token, stack)):
+            # Leer una variable en modo registros no emite código ni toca A
+            self.flush_pending_store()
+        
+        if token in self.variables and self.registers:
+            # Las variables se leen directo de su posición, sin copiarlas
+            stack.append(f"v_{token}")
+            
+        elif token in self.variables:
+            # Cargar variable
+            self.add_instruction(f"MOV A, (v_{token})")
+            temp = self.get_temp_var()
+            self.add_instruction(f"MOV ({temp}), A")
+            stack.append(temp)
+            if self.memo_abs:
+                self.slot_sources[temp] = f"v_{token}"
+            self.add_error_check()
+            
+        elif is_literal(token):
+            self.push_constant(token, stack)
+            
+        elif token in UNARY_OPERATORS:
+            if not stack:
+                raise ExpressionError(f"Error: Operador '{token}' requiere un operando")
+            op = stack.pop()
+            result_temp = self.get_temp_var()
+            
+            if token == 'zero_of':
+                # El valor de op se descarta, sus errores ya se revisaron
                 self.add_instruction(f"MOV A, 0")
-                self.add_instruction(f"MOV ({temp}), A")
-                self.memory_accesses += 1
-                stack.append(temp)
-                
-            elif token == '+':
-                if len(stack) < 2:
-                    raise Exception("Error: Operador '+' requiere dos operandos")
-                op2 = stack.pop()
-                op1 = stack.pop()
-                
-                # Realizar suma
-                self.add_instruction(f"MOV A, ({op1})")
-                self.memory_accesses += 1
-                self.add_instruction(f"ADD A, ({op2})")
-                self.memory_accesses += 1
-                
-                # Guardar resultado
-                result_temp = self.get_temp_var()
-                self.add_instruction(f"MOV ({result_temp}), A")
-                self.memory_accesses += 1
-                
-                # Verificar overflow
-                overflow_check = self.check_overflow_addition(op1, op2, result_temp)
-                for line in overflow_check:
+                self.store_result(result_temp)
+                stack.append(result_temp)
+                self.release_operands(op)
+            else:
+                if token == 'neg':
+                    unary_code = self.generate_negation(op, result_temp)
+                elif token == 'chk_min':
+                    unary_code = self.generate_value_check(op, result_temp, 128)
+                else:
+                    unary_code = self.generate_value_check(op, result_temp, 0, result_value=0)
+                for line in unary_code:
                     self.add_instruction(line)
                 
                 stack.append(result_temp)
+                self.accumulator = result_temp
                 self.add_error_check()
-                
-            elif token == '-':
-                if len(stack) < 2:
-                    raise Exception("Error: Operador '-' requiere dos operandos")
-                op2 = stack.pop()
-                op1 = stack.pop()
-                
-                # Realizar resta
+                self.release_operands(op)
+            
+        elif token == '+':
+            if len(stack) < 2:
+                raise ExpressionError("Error: Operador '+' requiere dos operandos")
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            # Realizar suma (conmutativa: si el resultado postergado es op2, ya está en A)
+            if self.pending_store == op2:
+                self.add_instruction(f"ADD A, ({op1})")
+            else:
+                self.load_accumulator(op1)
+                self.add_instruction(f"ADD A, ({op2})")
+            self.pending_store = None
+            
+            # Guardar resultado
+            result_temp = self.get_temp_var()
+            
+            # Verificar overflow
+            if self.flag_overflow:
+                self.store_result(result_temp)
+                overflow_check = self.check_overflow_flag(result_temp)
+            else:
+                self.add_instruction(f"MOV ({result_temp}), A")
+                overflow_check = self.check_overflow_addition(op1, op2, result_temp)
+            for line in overflow_check:
+                self.add_instruction(line)
+            
+            stack.append(result_temp)
+            # Con el flag A no se toca: queda el resultado (o el 0 que deja el error)
+            self.accumulator = result_temp if self.flag_overflow else None
+            self.add_error_check()
+            self.release_operands(op1, op2)
+            
+        elif token == '-':
+            if len(stack) < 2:
+                raise ExpressionError("Error: Operador '-' requiere dos operandos")
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            # Realizar resta. Si el resultado postergado es op2 pasa a B
+            if self.pending_store == op2:
+                self.add_instruction("MOV B, A")
                 self.add_instruction(f"MOV A, ({op1})")
-                self.memory_accesses += 1
+                self.add_instruction("SUB A, B")
+            else:
+                self.load_accumulator(op1)
                 self.add_instruction(f"SUB A, ({op2})")
-                self.memory_accesses += 1
-                
-                # Guardar resultado
-                result_temp = self.get_temp_var()
+            self.pending_store = None
+            
+            # Guardar resultado
+            result_temp = self.get_temp_var()
+            
+            # Verificar overflow
+            if self.flag_overflow:
+                self.store_result(result_temp)
+                overflow_check = self.check_overflow_flag(result_temp)
+            else:
                 self.add_instruction(f"MOV ({result_temp}), A")
-                self.memory_accesses += 1
-                
-                # Verificar overflow
                 overflow_check = self.check_overflow_subtraction(op1, op2, result_temp)
-                for line in overflow_check:
-                    self.add_instruction(line)
-                
-                stack.append(result_temp)
-                self.add_error_check()
-                
-            elif token == '*':
-                if len(stack) < 2:
-                    raise Exception("Error: Operador '*' requiere dos operandos")
-                op2 = stack.pop()
-                op1 = stack.pop()
-                
-                var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
-                var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
-                
-                # Generar multiplicación con signo
-                mul_code = self.generate_multiplication_signed(var1, var2)
-                for line in mul_code:
-                    self.add_instruction(line)
-                
-                result_temp = self.get_temp_var()
-                self.add_instruction(f"MOV ({result_temp}), A")
-                self.memory_accesses += 1
-                stack.append(result_temp)
-                self.add_error_check()
-                
+            for line in overflow_check:
+                self.add_instruction(line)
+            
+            stack.append(result_temp)
+            # Con el flag A no se toca: queda el resultado (o el 0 que deja el error)
+            self.accumulator = result_temp if self.flag_overflow else None
+            self.add_error_check()
+            self.release_operands(op1, op2)
+            
+        elif token in ('*', '/', '%') and self.constant_operand(token, stack) is not None:
+            # Operando constante: código especializado, sin los loops genéricos
+            source, value = self.constant_operand(token, stack)
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            result_temp = self.get_temp_var()
+            if token == '*':
+                constant_code = self.generate_multiplication_constant(source, value, result_temp)
             elif token == '/':
-                if len(stack) < 2:
-                    raise Exception("Error: Operador '/' requiere dos operandos")
-                op2 = stack.pop()
-                op1 = stack.pop()
-                
-                var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
-                var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
-                
-                # Generar división con signo
-                div_code = self.generate_division_signed(var1, var2)
-                for line in div_code:
-                    self.add_instruction(line)
-                
-                result_temp = self.get_temp_var()
-                self.add_instruction(f"MOV ({result_temp}), A")
-                self.memory_accesses += 1
-                stack.append(result_temp)
-                self.add_error_check()
-                
-            elif token == '%':
-                if len(stack) < 2:
-                    raise Exception("Error: Operador '%' requiere dos operandos")
-                op2 = stack.pop()
-                op1 = stack.pop()
-                
-                var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
-                var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
-                
-                # Generar módulo
-                mod_code = self.generate_modulo_signed(var1, var2)
-                for line in mod_code:
-                    self.add_instruction(line)
-                
-                result_temp = self.get_temp_var()
-                self.add_instruction(f"MOV ({result_temp}), A")
-                self.memory_accesses += 1
-                stack.append(result_temp)
+                constant_code = self.generate_division_constant(source, value, result_temp)
+            else:
+                constant_code = self.generate_modulo_constant(source, value, result_temp)
+            for line in constant_code:
+                self.add_instruction(line)
+            
+            stack.append(result_temp)
+            self.accumulator = result_temp
+            # x * 0 no falla; / y % solo fallan si el divisor constante es 0
+            if (value != 0 if token == '*' else value == 0):
                 self.add_error_check()
-        
-        if len(stack) != 1:
-            raise Exception("Error: Expresión inválida - resultado no único")
-        
-        # El resultado final está en el stack
-        result = stack[0]
-        self.add_instruction(f"MOV A, ({result})")
-        self.memory_accesses += 1
+            self.release_operands(op1, op2)
+            
+        elif token == '*':
+            if len(stack) < 2:
+                raise ExpressionError("Error: Operador '*' requiere dos operandos")
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
+            var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
+            
+            # Generar multiplicación con signo
+            mul_code = self.generate_multiplication_signed(var1, var2)
+            for line in mul_code:
+                self.add_instruction(line)
+            
+            result_temp = self.get_temp_var()
+            self.store_result(result_temp)
+            stack.append(result_temp)
+            self.add_error_check()
+            self.release_operands(op1, op2)
+            
+        elif token == '/':
+            if len(stack) < 2:
+                raise ExpressionError("Error: Operador '/' requiere dos operandos")
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
+            var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
+            
+            # Generar división con signo
+            div_code = self.generate_division_signed(var1, var2)
+            for line in div_code:
+                self.add_instruction(line)
+            
+            result_temp = self.get_temp_var()
+            self.store_result(result_temp)
+            stack.append(result_temp)
+            self.add_error_check()
+            self.release_operands(op1, op2)
+            
+        elif token == '%':
+            if len(stack) < 2:
+                raise ExpressionError("Error: Operador '%' requiere dos operandos")
+            op2 = stack.pop()
+            op1 = stack.pop()
+            
+            var1 = op1.replace('v_', '') if op1.startswith('v_') else op1
+            var2 = op2.replace('v_', '') if op2.startswith('v_') else op2
+            
+            # Generar módulo
+            mod_code = self.generate_modulo_signed(var1, var2)
+            for line in mod_code:
+                self.add_instruction(line)
+            
+            result_temp = self.get_temp_var()
+            self.store_result(result_temp)
+            stack.append(result_temp)
+            self.add_error_check()
+            self.release_operands(op1, op2)
     
-    def compile(self, expression: str) -> Tuple[str, int, int]:
+    def find_error_checks(self, items: List[ir.Item]) -> List[int]:
+        """Posiciones de las secuencias MOV R, (v_error) / CMP R, 1 / JEQ x"""
+        checks = []
+        for i in range(len(items) - 2):
+            load, compare, jump = items[i:i + 3]
+            if not (ir.is_mov(load) and load.operands[1].kind == ir.MEMORY
+                    and load.operands[1].value == "v_error"):
+                continue
+            register = load.operands[0]
+            if (isinstance(compare, ir.Instruction) and compare.op == "CMP"
+                    and ir.same_operand(compare.operands[0], register)
+                    and compare.operands[1].kind == ir.LITERAL and compare.operands[1].value == "1"
+                    and isinstance(jump, ir.Instruction) and jump.op == "JEQ"):
+                checks.append(i)
+        return checks
+    
+    def prune_error_checks(self, items: List[ir.Item]) -> List[ir.Item]:
+        """
+        Análisis de flujo de datos sobre las instrucciones: un chequeo de
+        v_error sobra si por ningún camino se pudo escribir v_error desde el
+        último chequeo (o desde el inicio). Se elimina solo si el registro que
+        usa el chequeo no se lee después.
+        """
+        labels = ir.label_positions(items)
+        checks = self.find_error_checks(items)
+        check_jumps = {i + 2 for i in checks}
+        
+        # dirty[i]: v_error pudo cambiar antes de ejecutar la instrucción i
+        # (None = inalcanzable)
+        dirty: List[Optional[bool]] = [None] * (len(items) + 1)
+        dirty[0] = False
+        pending = [0]
+        while pending:
+            i = pending.pop()
+            if i >= len(items):
+                continue
+            state = dirty[i]
+            item = items[i]
+            successors = []
+            if isinstance(item, ir.Label):
+                successors.append((i + 1, state))
+            else:
+                target = item.operands[0] if item.operands else None
+                if item.op == "MOV" and target.kind == ir.MEMORY and target.value == "v_error":
+                    state = True
+                if item.op == "JMP":
+                    successors.append((labels[target.value], state))
+                elif item.is_jump:
+                    # Si el chequeo no salta, v_error sigue en 0
+                    successors.append((i + 1, False if i in check_jumps else state))
+                    successors.append((labels[target.value], state))
+                else:
+                    successors.append((i + 1, state))
+            
+            for successor, new_state in successors:
+                old_state = dirty[successor]
+                merged = new_state if old_state is None else (old_state or new_state)
+                if merged != old_state:
+                    dirty[successor] = merged
+                    pending.append(successor)
+        
+        removed = set()
+        for i in checks:
+            register = items[i].operands[0].value
+            if not dirty[i] and ir.is_register_dead(items, i + 3, register, labels):
+                removed.update((i, i + 1, i + 2))
+                self.error_checks_removed += 1
+        
+        return [item for i, item in enumerate(items) if i not in removed]
+    
+    def generate_code(self, expression: str) -> None:
+        """Genera el código (sin DATA) de la expresión mediante add_instruction"""
         self.reset()
+        postfix = self.parse(expression)
         
+        try:
+            self.compile_postfix(postfix)
+        except Exception as e:
+            raise Exception(str(e))
+        
+        self.finish_program()
+    
+    def parse(self, expression: str) -> List[str]:
+        """Valida 'result = ...' y retorna la expresión en notación postfija"""
         if '=' not in expression:
-            raise Exception("Error: Expresión debe tener formato: result = ...")
+            raise ExpressionError("Error: Expresión debe tener formato: result = ...")
         
         expr_part = expression.split('=', 1)[1].strip()
         
         if not expr_part:
-            raise Exception("Error: Expresión vacía después del '='")
+            raise ExpressionError("Error: Expresión vacía después del '='")
         
         try:
             tokens = self.tokenize_expression(expr_part)
             postfix = self.shunting_yard(tokens)
-            
-            if not postfix:
-                raise Exception("Error: No hay operandos en la expresión")
-            
-            self.compile_postfix(postfix)
+            if self.simplify:
+                postfix = self.simplify_postfix(postfix)
+            if self.reorder:
+                postfix = self.order_evaluation(postfix)
         except Exception as e:
             raise Exception(str(e))
         
+        if not postfix:
+            raise ExpressionError("Error: No hay operandos en la expresión")
+        return postfix
+    
+    def generate_code_stream(self, characters: Iterable[str]) -> None:
+        """
+        Como generate_code, pero los caracteres se consumen de a uno y cada
+        token postfijo pasa directo a compile_postfix: la expresión nunca está
+        completa en memoria (salvo con simplify, reorder, cse o memo_abs, que
+        necesitan la expresión completa).
+        Si la expresión tiene varios errores se reporta el primero que aparece
+        al leerla, que puede no ser el que reporta generate_code.
+        """
+        self.reset()
+        characters = iter(characters)
+        
+        for c in characters:
+            if c == '=':
+                break
+        else:
+            raise ExpressionError("Error: Expresión debe tener formato: result = ...")
+        
+        # Igual que el strip() de generate_code: las posiciones de error se
+        # cuentan desde el primer carácter no blanco
+        characters = itertools.dropwhile(str.isspace, characters)
+        first = next(characters, None)
+        if first is None:
+            raise ExpressionError("Error: Expresión vacía después del '='")
+        
+        postfix = self.iter_shunting_yard(self.iter_tokens(itertools.chain(first, characters)))
+        if self.simplify:
+            postfix = self.simplify_postfix(list(postfix))
+        if self.reorder:
+            postfix = self.order_evaluation(list(postfix))
+        self.compile_postfix(postfix)
+        
+        self.finish_program()
+    
+    def finish_program(self) -> None:
         # Manejo final de resultado
+        if self.registers:
+            # Los chequeos de error llegan aquí con A ocupado: el resultado queda en 1
+            self.add_instruction("JMP end_program")
+            self.add_instruction("error_program:")
+            self.add_instruction("MOV A, 1")
         self.add_instruction("end_program:")
         self.add_instruction("MOV (v_result), A")
-        self.memory_accesses += 1
-        
-        # Generar código completo
-        full_assembly = "DATA:\n"
-        for var in self.variables:
-            full_assembly += f"v_{var} 0\n"
-        full_assembly += "v_error 0\n"
-        full_assembly += "v_result 0\n"
-        
-        for i in range(self.temp_counter):
-            full_assembly += f"v_temp{i} 0\n"
-        
-        full_assembly += "\nCODE:\n"
-        full_assembly += "\n".join(self.assembly_code)
-        
-        return full_assembly, self.lines_count, self.memory_accesses
+    
+    def data_names(self) -> List[str]:
+        return [f"v_{var}" for var in self.variables] + ["v_error", "v_result"]
+    
+    def data_section(self) -> List[str]:
+        """Líneas de la sección DATA (se conoce recién cuando el código está generado)"""
+        return ir.data_lines(self.data_names(), self.temp_counter)
+    
+    def lower(self, expression: str) -> ir.Program:
+        """Genera el código de la expresión como programa en representación intermedia"""
+        self.generate_code(expression)
+        return ir.Program(self.assembly_code, self.data_names(), self.temp_counter,
+                          memory_accesses=self.memory_accesses)
+    
+    def passes(self) -> List[Tuple[str, ir.Pass]]:
+        """Pasadas que activan las opciones, en el orden en que se aplican"""
+        passes = []
+        # Con direct_errors ningún camino llega a un chequeo con error,
+        # así que el análisis los elimina todos
+        if self.prune_checks or self.direct_errors:
+            passes.append(("prune_checks", self.prune_pass))
+        if self.peephole:
+            passes.append(("peephole", ir.peephole_pass(self.peephole_rules, self.peephole_hits)))
+            passes.append(("dead_temp_stores", ir.dead_temp_stores))
+            passes.append(("compact_temps", ir.compact_temps))
+        return passes
+    
+    def prune_pass(self, program: ir.Program) -> int:
+        removed = self.error_checks_removed
+        program.items = self.prune_error_checks(program.items)
+        return self.error_checks_removed - removed
+    
+    def compile(self, expression: str) -> Tuple[str, int, int]:
+        """
+        Retorna (assembly, líneas, accesos a memoria). Los accesos se cuentan
+        sobre el código final: un operando '(...)' por instrucción, incluidos
+        los de los chequeos de overflow y los loops. Antes del peephole se
+        contaban a mano y faltaban esos bloques ('result = a + b' daba 12,
+        ahora 20), así que los números no se comparan con salidas anteriores.
+        """
+        return ir.compile_with(self, expression)
+    
+    def compile_to(self, expression: str, output: TextIO) -> Tuple[int, int]:
+        """
+        Igual que compile() pero escribe el programa en 'output' a medida que
+        se genera. El código va a un archivo temporal y se copia tras la
+        sección DATA, que depende de cuántos temporales se usaron. La poda de
+        chequeos y el peephole recorren el programa completo, así que con esas
+        opciones el código se arma en memoria como en compile().
+        """
+        if self.prune_checks or self.direct_errors or self.peephole:
+            assembly, lines, memory = self.compile(expression)
+            output.write(assembly)
+            return lines, memory
+        
+        self.write_program(output, lambda: self.generate_code(expression))
+        return self.lines_count, self.memory_accesses
+    
+    def compile_stream(self, source, output: TextIO) -> Tuple[int, int]:
+        """
+        Compila una expresión 'result = ...' leída de un archivo de texto o un
+        mmap, escribiendo el programa en 'output'. Ni la entrada ni el código
+        generado se guardan completos en memoria.
+        """
+        if self.prune_checks or self.direct_errors or self.peephole:
+            raise Exception("Error: La poda de chequeos y el peephole necesitan el "
+                            "programa completo; use compile_to")
+        self.write_program(output, lambda: self.generate_code_stream(read_characters(source)))
+        return self.lines_count, self.memory_accesses
+    
+    def write_program(self, output: TextIO, generate: Callable[[], None]) -> None:
+        """Ejecuta 'generate' con el código dirigido a un archivo temporal y arma el programa"""
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+            self.output = spool
+            try:
+                generate()
+            finally:
+                self.output = None
+            output.write("\n".join(self.data_section() + ["", "CODE:", ""]))
+            spool.seek(0)
+            shutil.copyfileobj(spool, output)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: python compilador_completo.py <expresión>")
-        print("Ejemplo: python compilador_completo.py 'result = a + b * c - d / e + f % g'")
-        print("Soporta operadores: +, -, *, /, % con manejo de signo y overflow")
-        sys.exit(1)
+class TempRecorder(Compilador):
+    """
+    Genera el código de un solo token con operandos simbólicos (v_arg0,
+    v_arg1) y registra cada pedido y liberación de temporales
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.events: List[Tuple[str, int]] = []
+        self.local_temps = 0
+    
+    def reset(self):
+        super().reset()
+        self.events = []
+        self.local_temps = 0
+    
+    def get_temp_var(self) -> str:
+        temp = self.local_temps
+        self.local_temps += 1
+        self.events.append(('get', temp))
+        return f"v_temp{temp}"
+    
+    def free_temp_var(self, *temps: str):
+        for temp in temps:
+            if temp.startswith("v_temp"):
+                self.events.append(('free', int(temp[len("v_temp"):])))
+            elif temp.startswith("v_arg"):
+                self.events.append(('free_arg', int(temp[len("v_arg"):])))
     
-    expression = sys.argv[1]
+    def record(self, token: str) -> List[Tuple[str, int]]:
+        """Retorna los eventos de temporales del código del token"""
+        self.reset()
+        self.compile_token(token, [f"v_arg{i}" for i in range(arity(token))])
+        return self.events
+
+
+# Elementos mínimos de un tramo de una pasada reanudable. Un tramo tampoco
+# consume menos elementos que el tamaño del estado con que empieza el
+# siguiente, así guardar los estados cuesta a lo más uno por elemento
+SEGMENT_LENGTH = 8
+# Un token del fuente: una constante completa o un carácter que no es espacio
+SOURCE_TOKEN = re.compile(r'[0-9]+|\S')
+
+
+class Segment:
+    """
+    Tramo de una pasada reanudable: el estado con que empieza, cuántos
+    elementos de la entrada consume y lo que produce. Los tramos de la
+    generación de código guardan su código ya formateado (cada instrucción
+    terminada en salto de línea, salvo al final del programa) y lo que suman
+    a las líneas, los accesos a memoria y los temporales pedidos.
+    """
+    
+    def __init__(self, state: tuple):
+        self.state = state
+        self.consumed = 0
+        self.output: List[str] = []
+        self.text = ''
+        self.lines = 0
+        self.memory = 0
+        self.requested = 0
+
+
+def rechain(chain: tuple, before: int, stack: List[str]) -> tuple:
+    """
+    Pila persistente (tope, resto) que corresponde a stack después de un
+    paso que sacó elementos de una pila de largo before y agregó a lo más
+    uno. Comparte con la anterior todo lo que el paso no tocó, así guardarla
+    en cada tramo no depende de su profundidad.
+    """
+    kept = max(min(before, len(stack) - 1), 0)
+    for _ in range(before - kept):
+        chain = chain[1]
+    for item in stack[kept:]:
+        chain = (item, chain)
+    return chain
+
+
+def unchain(chain: tuple) -> List[str]:
+    """Lista (del fondo al tope) de una pila persistente"""
+    stack = []
+    while chain:
+        item, chain = chain
+        stack.append(item)
+    stack.reverse()
+    return stack
+
+
+def common_prefix(old: str, new: str) -> int:
+    """Largo del prefijo común (búsqueda binaria sobre comparaciones de slices)"""
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(old: str, new: str, limit: int) -> int:
+    """Largo del sufijo común, sin superar limit"""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class CompiladorIncremental(Compilador):
+    """
+    Compilador para ediciones sucesivas de una expresión. Guarda de la
+    compilación anterior los tokens, y el shunting-yard y la generación de
+    código partidos en tramos con el estado con que empieza cada uno. Tras
+    una edición se vuelve a tokenizar solo la zona cambiada; cada pasada se
+    retoma desde el tramo anterior a la zona y se corta en cuanto, ya en la
+    parte común, su estado coincide con el de la compilación anterior: desde
+    ahí el resultado es el mismo y se reutilizan los tramos guardados.
+    Solo se guarda la última compilación. Produce el mismo programa que
+    Compilador() sin opciones; las expresiones inválidas (ExpressionError)
+    las vuelve a compilar Compilador para dar su mensaje y se cuentan en
+    fallbacks.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.fallbacks = 0  # Compilaciones de expresiones inválidas hechas por Compilador
+        self.forget()
+    
+    def forget(self) -> None:
+        """Descarta la compilación anterior: la próxima se hace completa"""
+        self.source = ''
+        self.tokens: List[str] = []
+        self.token_starts: List[int] = []
+        self.postfix: List[str] = []
+        self.syntax_segments: List[Segment] = []
+        self.code_segments: List[Segment] = []
+        self.totals = {'lines': 0, 'memory': 0, 'requested': 0}
+        self.reused_nodes = 0
+        self.generated_nodes = 0
+    
+    def lower(self, expression: str) -> ir.Program:
+        self.reset()
+        if '=' not in expression or not expression.split('=', 1)[1].strip():
+            self.forget()
+            self.fallbacks += 1
+            return super().lower(expression)
+        try:
+            return self.lower_incremental(expression.split('=', 1)[1].strip())
+        except ExpressionError:
+            # Expresión inválida: Compilador reporta el error de siempre. Otras
+            # excepciones son fallas del modo incremental y se propagan
+            self.forget()
+            self.fallbacks += 1
+            return super().lower(expression)
+    
+    def lower_incremental(self, source: str) -> ir.Program:
+        # Tokens: se vuelve a leer solo la zona que cambió del fuente
+        first, old_end, new_end = self.retokenize(source)
+        
+        # Shunting-yard sobre los tokens; el postfijo cambia en la zona de
+        # los tramos que se rehicieron
+        self.syntax_segments, index, removed, added = self.resume(
+            self.syntax_segments, self.tokens, max(first - 1, 0), old_end, new_end,
+            self.syntax_state, self.restore_syntax, lambda: 0,
+            self.syntax_step, self.syntax_finish)
+        first = sum(map(len, map(attrgetter('output'), self.syntax_segments[:index])))
+        old_end = first + sum(len(segment.output) for segment in removed)
+        new_end = first + sum(len(segment.output) for segment in added)
+        self.postfix[first:old_end] = itertools.chain.from_iterable(
+            segment.output for segment in added)
+        
+        # Generación de código sobre el postfijo
+        self.code_segments, _, removed, added = self.resume(
+            self.code_segments, self.postfix, max(first - 1, 0), old_end, new_end,
+            self.code_state, self.restore_code,
+            lambda: len(self.free_temps) + len(self.constants),
+            self.code_step, self.code_finish)
+        for segment in added:
+            if segment is self.code_segments[-1]:
+                # El final del programa no lleva salto de línea
+                segment.text = "\n".join(segment.output)
+            else:
+                segment.text = "".join(f"{line}\n" for line in segment.output)
+            segment.lines = len(segment.output)
+            segment.output = []
+        for name in ('lines', 'memory', 'requested'):
+            self.totals[name] += (sum(map(attrgetter(name), added)) -
+                                  sum(map(attrgetter(name), removed)))
+        self.generated_nodes = sum(segment.consumed for segment in added)
+        self.reused_nodes = len(self.postfix) - self.generated_nodes
+        
+        self.lines_count = self.totals['lines']
+        self.memory_accesses = self.totals['memory']
+        self.temps_requested = self.totals['requested']
+        self.temp_counter = self.code_segments[-1].state[1]
+        code = "".join(map(attrgetter('text'), self.code_segments))
+        return ir.Program(None, self.data_names(), self.temp_counter,
+                          memory_accesses=self.memory_accesses, code_text=code,
+                          lines=self.lines_count)
+    
+    def retokenize(self, source: str) -> Tuple[int, int, int]:
+        """
+        Actualiza los tokens para el nuevo fuente leyendo solo los que tocan
+        la zona cambiada. Retorna (inicio, fin anterior, fin nuevo) de los
+        tokens reemplazados. Los paréntesis desbalanceados los detecta el
+        shunting-yard, que recorre todo lo que cambia de anidamiento.
+        """
+        old = self.source
+        prefix = common_prefix(old, source)
+        suffix = common_suffix(old, source, min(len(old), len(source)) - prefix)
+        old_changed_end = len(old) - suffix
+        
+        # Tokens que empiezan antes del cambio (el último puede seguir con
+        # dígitos agregados) y después de su fin (el primero puede pegarse)
+        first = max(bisect.bisect_left(self.token_starts, prefix) - 1, 0)
+        old_end = bisect.bisect_right(self.token_starts, old_changed_end)
+        start = self.token_starts[first] if first < len(self.tokens) else 0
+        shift = len(source) - len(old)
+        end = self.token_starts[old_end] + shift if old_end < len(self.tokens) else len(source)
+        
+        tokens, starts = [], []
+        for match in SOURCE_TOKEN.finditer(source, start, end):
+            text = match.group()
+            if text[0] in '0123456789':
+                text = self.literal_token(text, match.start())
+            elif text not in '+-*/%()abcdefg':
+                raise ExpressionError(f"Error: Carácter no válido '{text}' en posición {match.start()}")
+            tokens.append(text)
+            starts.append(match.start())
+        
+        self.source = source
+        self.tokens[first:old_end] = tokens
+        self.token_starts[first:] = starts + list(map(shift.__add__, self.token_starts[old_end:]))
+        return first, old_end, first + len(tokens)
+    
+    def resume(self, segments: List[Segment], inputs: List[str], first: int, old_end: int,
+               new_end: int, snapshot: Callable[[int], tuple],
+               restore: Callable[[Optional[tuple]], None], state_size: Callable[[], int],
+               step: Callable[[int, Segment], None], finish: Callable[[Segment], None]
+               ) -> Tuple[List[Segment], int, List[Segment], List[Segment]]:
+        """
+        Vuelve a correr una pasada cuya entrada cambió: los elementos
+        [first, old_end) de la anterior son ahora [first, new_end). Se retoma
+        desde el tramo que contiene first; en la parte común se compara el
+        estado en cada inicio de un tramo anterior y, si coincide, se usan los
+        tramos anteriores desde ahí. Retorna (tramos, posición del primero
+        que cambió, tramos descartados, tramos nuevos).
+        """
+        starts = list(itertools.accumulate(map(attrgetter('consumed'), segments), initial=0))
+        index = max(min(bisect.bisect_right(starts, first), len(segments)) - 1, 0)
+        restore(segments[index].state if segments else None)
+        i = starts[index]
+        shift = new_end - old_end
+        added: List[Segment] = []
+        segment = None
+        while True:
+            state = None
+            if i >= new_end:
+                k = bisect.bisect_left(starts, i - shift)
+                if k < len(segments) and starts[k] == i - shift:
+                    state = snapshot(i)
+                    if state == segments[k].state:
+                        return (segments[:index] + added + segments[k:], index,
+                                segments[index:k], added)
+            # El final va en un tramo propio: su estado es el de toda la pasada
+            if (state is not None or segment is None or i == len(inputs) or
+                    (i < new_end and segment.consumed >= max(SEGMENT_LENGTH, state_size()))):
+                segment = Segment(snapshot(i) if state is None else state)
+                added.append(segment)
+            if i == len(inputs):
+                finish(segment)
+                return segments[:index] + added, index, segments[index:], added
+            step(i, segment)
+            segment.consumed += 1
+            i += 1
+    
+    def syntax_state(self, i: int) -> tuple:
+        # El token anterior decide si un + o - es signo unario
+        return self.saved_operators, self.tokens[i - 1] if i else None
+    
+    def restore_syntax(self, state: Optional[tuple]) -> None:
+        self.saved_operators = state[0] if state else ()
+        self.operators = unchain(self.saved_operators)
+    
+    def syntax_step(self, i: int, segment: Segment) -> None:
+        tokens = self.tokens
+        before = len(self.operators)
+        segment.output.extend(self.shunting_step(
+            tokens[i], tokens[i - 1] if i else None,
+            tokens[i + 1] if i + 1 < len(tokens) else None, self.operators))
+        self.saved_operators = rechain(self.saved_operators, before, self.operators)
+    
+    def syntax_finish(self, segment: Segment) -> None:
+        segment.output.extend(self.shunting_finish(self.operators))
+    
+    def code_state(self, i: int) -> tuple:
+        return (self.saved_operands, self.temp_counter, tuple(self.free_temps),
+                self.op_id_counter, dict(self.constants))
+    
+    def restore_code(self, state: Optional[tuple]) -> None:
+        if state is None:
+            state = ((), 0, (), 0, {})
+        self.saved_operands, self.temp_counter, free, self.op_id_counter, constants = state
+        self.operand_stack = unchain(self.saved_operands)
+        self.free_temps = list(free)
+        self.constants = dict(constants)
+    
+    def code_step(self, i: int, segment: Segment) -> None:
+        """Como una vuelta de compile_postfix, con las líneas dirigidas al tramo"""
+        self.assembly_code = segment.output
+        memory, requested = self.memory_accesses, self.temps_requested
+        token = self.postfix[i]
+        following = self.postfix[i + 1] if i + 1 < len(self.postfix) else None
+        before = len(self.operand_stack)
+        if self.extended_isa and is_literal(token) and following in ('*', '/', '%'):
+            self.push_constant(token, self.operand_stack, store=False)
+        else:
+            self.compile_token(token, self.operand_stack)
+        self.saved_operands = rechain(self.saved_operands, before, self.operand_stack)
+        segment.memory += self.memory_accesses - memory
+        segment.requested += self.temps_requested - requested
+    
+    def code_finish(self, segment: Segment) -> None:
+        self.assembly_code = segment.output
+        memory = self.memory_accesses
+        if len(self.operand_stack) != 1:
+            raise ExpressionError("Error: Expresión inválida - resultado no único")
+        self.load_accumulator(self.operand_stack[0])
+        self.finish_program()
+        segment.memory += self.memory_accesses - memory
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compilador de expresiones a assembly ASUA. "
+                    "Soporta operadores: +, -, *, /, % con manejo de signo y overflow",
+        epilog="Ejemplo: python compilador5.py 'result = a + b * c - d / e + f % g'")
+    parser.add_argument("expression", nargs="?", help="Expresión en formato 'result = ...'")
+    parser.add_argument("-i", "--input", default=None,
+                        help="Lee la expresión de un archivo (mmap) en vez del argumento; con "
+                             "--peephole, --prune-checks o --direct-errors se lee entero")
+    parser.add_argument("--peephole", action="store_true",
+                        help="Aplica el optimizador peephole sobre el código generado")
+    parser.add_argument("--simplify", action="store_true",
+                        help="Aplica simplificaciones algebraicas antes de generar código")
+    parser.add_argument("--registers", action="store_true",
+                        help="Mantiene el valor en curso en A y lee las variables sin copiarlas")
+    parser.add_argument("--prune-checks", action="store_true",
+                        help="Elimina los chequeos de v_error que no pueden detectar nada nuevo")
+    parser.add_argument("--direct-errors", action="store_true",
+                        help="Los overflow y divisiones por cero saltan directo a end_program")
+    parser.add_argument("--cse", action="store_true",
+                        help="Calcula una sola vez cada subexpresión repetida")
+    parser.add_argument("--memo-abs", action="store_true",
+                        help="Reutiliza el valor absoluto de una variable entre operaciones")
+    parser.add_argument("--reorder", action="store_true",
+                        help="Evalúa primero el subárbol que necesita más temporales (Sethi-Ullman)")
+    parser.add_argument("--flag-overflow", action="store_true",
+                        help="Detecta el overflow de + y - con el flag V (JOV)")
+    parser.add_argument("--extended-isa", action="store_true",
+                        help="Usa JCR, SHL y SHR (definidos solo en simulador.py) para "
+                             "intercambiar los factores de * y especializar las constantes")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Escribe el programa en este archivo a medida que se genera")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mide tiempo, llamadas y líneas emitidas por cada fase del compilador")
+    parser.add_argument("--wcet", action="store_true",
+                        help="Reporta la cota de peor caso de instrucciones y accesos a memoria")
+    args = parser.parse_args()
+    if (args.expression is None) == (args.input is None):
+        parser.error("indique una expresión o un archivo con --input")
+    if args.wcet and args.input:
+        parser.error("--wcet necesita la expresión como argumento")
     
     try:
-        compilador = Compilador()
-        assembly, lines, memory = compilador.compile(expression)
-        
-        print(assembly)
+        compilador = Compilador(peephole=args.peephole, cse=args.cse,
+                                simplify=args.simplify, registers=args.registers,
+                                prune_checks=args.prune_checks,
+                                direct_errors=args.direct_errors,
+                                memo_abs=args.memo_abs, reorder=args.reorder,
+                                flag_overflow=args.flag_overflow,
+                                extended_isa=args.extended_isa, profile=args.profile)
+        expression = args.expression
+        whole_program = args.prune_checks or args.direct_errors or args.peephole
+        if args.input and whole_program:
+            # La poda de chequeos y el peephole necesitan el programa completo:
+            # el archivo se lee entero y se compila como una expresión más
+            with open(args.input, encoding='utf-8') as source:
+                expression = source.read()
+        
+        if args.input and not whole_program:
+            output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+            try:
+                with open(args.input, 'rb') as source:
+                    if os.fstat(source.fileno()).st_size:
+                        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                            lines, memory = compilador.compile_stream(mapped, output)
+                    else:
+                        lines, memory = compilador.compile_stream(source, output)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+            if not args.output:
+                print()
+        elif args.output:
+            with open(args.output, 'w', encoding='utf-8') as output:
+                lines, memory = compilador.compile_to(expression, output)
+        else:
+            assembly, lines, memory = compilador.compile(expression)
+            print(assembly)
         print(f"\nEstadísticas:")
         print(f"Líneas generadas: {lines}")
         print(f"Accesos a memoria: {memory}")
+        print(f"Temporales: {compilador.temp_counter} en DATA (pico) de "
+              f"{compilador.temps_requested} pedidos")
+        if args.simplify:
+            print(f"Simplificaciones aplicadas:")
+            for rule, hits in compilador.simplify_hits.items():
+                print(f"  {rule}: {hits}")
+        if args.cse:
+            print(f"Subexpresiones reutilizadas: {compilador.cse_hits}")
+        if args.reorder:
+            print(f"Subárboles reordenados: {compilador.reorder_swaps}")
+        if args.memo_abs:
+            print(f"Valores absolutos reutilizados: {compilador.abs_reuses}")
+        if args.prune_checks or args.direct_errors:
+            print(f"Chequeos de error eliminados: {compilador.error_checks_removed}")
+        if args.peephole:
+            print(f"Reglas peephole aplicadas:")
+            for name, hits in compilador.peephole_hits.items():
+                print(f"  {name}: {hits}")
+        if args.profile:
+            print(f"Perfil de compilación:")
+            print("\n".join(compilador.profile_stats.report()))
+        if args.wcet:
+            imprimir_reporte(reporte_peor_caso(compilador, args.expression))
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Compilación por lotes
+Lee una expresión 'result = ...' por línea desde un archivo o stdin y las
+compila todas con una sola instancia de Compilador (reutilizada vía reset()).
+Cada programa y sus estadísticas se escriben en un directorio o como JSONL.
+Con --cache las expresiones repetidas se sirven desde CacheCompilacion y con
+--jobs N el lote se reparte en bloques entre N procesos (un Compilador por
+proceso), manteniendo el orden de la entrada. --profile muestra al final en
+qué fases del compilador se fue el tiempo.
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from cache_compilacion import CacheCompilacion
+
+
+def crear_compilador(modulo: str, opciones: Optional[List[str]] = None):
+    """Instancia Compilador del módulo dado, activando las opciones booleanas indicadas"""
+    clase = importlib.import_module(modulo).Compilador
+    return clase(**{opcion: True for opcion in (opciones or [])})
+
+
+def compilar_expresion(compilador, numero: int, expresion: str) -> Dict:
+    """Compila una expresión y retorna su registro (con 'error' si falló)"""
+    registro = {'linea': numero, 'expresion': expresion}
+    try:
+        assembly, lineas, accesos = compilador.compile(expresion)
+    except Exception as e:
+        registro['error'] = str(e)
+        return registro
+    registro['assembly'] = assembly
+    registro['lineas'] = lineas
+    registro['accesos_memoria'] = accesos
+    if hasattr(compilador, 'temp_counter'):
+        registro['temporales'] = compilador.temp_counter
+    return registro
+
+
+def leer_expresiones(entrada: Iterable[str]) -> Iterator[tuple]:
+    """Entrega (número de línea, expresión), saltando líneas vacías y comentarios '#'"""
+    for numero, linea in enumerate(entrada, 1):
+        linea = linea.strip()
+        if linea and not linea.startswith('#'):
+            yield numero, linea
+
+
+def compilar_lote(compilador, entrada: Iterable[str]) -> Iterator[Dict]:
+    """Compila cada expresión de la entrada; un error no detiene el lote"""
+    for numero, expresion in leer_expresiones(entrada):
+        yield compilar_expresion(compilador, numero, expresion)
+
+
+# Compilador propio de cada proceso trabajador (lo crea inicializar_trabajador)
+_compilador_trabajador = None
+
+
+def inicializar_trabajador(modulo: str, opciones: List[str], cache: bool,
+                           capacidad: int, directorio: Optional[str]) -> None:
+    global _compilador_trabajador
+    _compilador_trabajador = crear_compilador(modulo, opciones)
+    if cache:
+        _compilador_trabajador = CacheCompilacion(_compilador_trabajador, capacidad, directorio)
+
+
+def compilar_bloque(bloque: List[tuple]) -> List[Dict]:
+    """Compila un bloque de (número de línea, expresión) en el proceso trabajador"""
+    return [compilar_expresion(_compilador_trabajador, numero, expresion)
+            for numero, expresion in bloque]
+
+
+def compilar_lote_paralelo(entrada: Iterable[str], trabajos: int, tamano_bloque: int,
+                           inicializacion: tuple) -> Iterator[Dict]:
+    """
+    Reparte la entrada en bloques entre 'trabajos' procesos y entrega los
+    registros en el orden original. Solo hay unos pocos bloques en vuelo a la
+    vez, así que la entrada se consume de a poco aunque tenga 100k líneas.
+    """
+    expresiones = leer_expresiones(entrada)
+    with ProcessPoolExecutor(max_workers=trabajos, initializer=inicializar_trabajador,
+                             initargs=inicializacion) as executor:
+        pendientes = deque()
+        while True:
+            while len(pendientes) < 2 * trabajos:
+                bloque = list(itertools.islice(expresiones, tamano_bloque))
+                if not bloque:
+                    break
+                pendientes.append(executor.submit(compilar_bloque, bloque))
+            if not pendientes:
+                break
+            yield from pendientes.popleft().result()
+
+
+def escribir_programa(registro: Dict, directorio: str) -> None:
+    """Escribe el programa de un registro como <directorio>/linea_<n>.asm"""
+    ruta = os.path.join(directorio, f"linea_{registro['linea']:06d}.asm")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(f"; {registro['expresion']}\n")
+        archivo.write(registro['assembly'])
+        archivo.write("\n\n; Estadísticas:\n")
+        archivo.write(f"; Líneas generadas: {registro['lineas']}\n")
+        archivo.write(f"; Accesos a memoria: {registro['accesos_memoria']}\n")
+
+
+def escribir_registros(registros: Iterable[Dict], directorio: Optional[str],
+                       jsonl: Optional[TextIO], errores: TextIO) -> tuple:
+    """Escribe cada registro en el destino elegido; retorna (compiladas, con error)"""
+    compiladas = fallidas = 0
+    for registro in registros:
+        if 'error' in registro:
+            fallidas += 1
+            print(f"Línea {registro['linea']}: {registro['error']}", file=errores)
+        else:
+            compiladas += 1
+            if directorio:
+                escribir_programa(registro, directorio)
+        if jsonl:
+            jsonl.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return compiladas, fallidas
+
+
+def agregar_argumentos_lote(parser: argparse.ArgumentParser) -> None:
+    """Argumentos comunes a los modos de compilación por lotes"""
+    parser.add_argument('entrada', nargs='?', default='-',
+                        help="Archivo con una expresión por línea ('-' o nada para stdin)")
+    parser.add_argument('--compilador', default='compilador5',
+                        help="Módulo compilador a usar (por defecto compilador5)")
+    parser.add_argument('--opcion', action='append', default=[],
+                        help="Opción booleana de Compilador a activar (ej: --opcion peephole)")
+    parser.add_argument('--salida', default=None,
+                        help="Directorio donde escribir un .asm por expresión")
+    parser.add_argument('--jsonl', default=None,
+                        help="Archivo JSONL de salida ('-' para stdout)")
+    parser.add_argument('--cache', action='store_true',
+                        help="Reutiliza el resultado de expresiones ya compiladas")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Directorio de la cache en disco (implica --cache)")
+    parser.add_argument('--cache-capacidad', type=int, default=1024,
+                        help="Entradas en la capa LRU en memoria (por defecto 1024)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Procesos que compilan en paralelo (por defecto 1)")
+    parser.add_argument('--bloque', type=int, default=256,
+                        help="Expresiones por bloque enviado a cada proceso (por defecto 256)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mide el tiempo de cada fase del compilador en todo el lote")
+
+
+def abrir_entrada(ruta: str) -> TextIO:
+    return sys.stdin if ruta == '-' else open(ruta, encoding='utf-8')
+
+
+def abrir_jsonl(args) -> Optional[TextIO]:
+    """Archivo JSONL elegido; si no hay destino alguno se usa stdout"""
+    if args.jsonl == '-' or (args.jsonl is None and args.salida is None):
+        return sys.stdout
+    if args.jsonl:
+        return open(args.jsonl, 'w', encoding='utf-8')
+    return None
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Compila una expresión 'result = ...' por línea con una sola instancia")
+    agregar_argumentos_lote(parser)
+    args = parser.parse_args()
+
+    if args.profile:
+        args.opcion.append('profile')
+    try:
+        compilador = crear_compilador(args.compilador, args.opcion)
+        if args.cache or args.cache_dir:
+            compilador = CacheCompilacion(compilador, args.cache_capacidad, args.cache_dir)
+        if args.salida:
+            os.makedirs(args.salida, exist_ok=True)
+        entrada = abrir_entrada(args.entrada)
+        jsonl = abrir_jsonl(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.jobs > 1:
+        # Cada proceso crea su propio Compilador; la cache en disco se comparte
+        registros = compilar_lote_paralelo(
+            entrada, args.jobs, max(1, args.bloque),
+            (args.compilador, args.opcion, bool(args.cache or args.cache_dir),
+             args.cache_capacidad, args.cache_dir))
+    else:
+        registros = compilar_lote(compilador, entrada)
+
+    try:
+        compiladas, fallidas = escribir_registros(registros, args.salida, jsonl, sys.stderr)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if jsonl not in (None, sys.stdout):
+            jsonl.close()
+
+    print(f"; {compiladas} expresiones compiladas, {fallidas} con error", file=sys.stderr)
+    if isinstance(compilador, CacheCompilacion) and args.jobs <= 1:
+        contadores = ", ".join(f"{nombre} {valor}" for nombre, valor in compilador.como_dict().items())
+        print(f"; Cache: {contadores}", file=sys.stderr)
+    if args.profile and args.jobs <= 1:
+        base = compilador.compilador if isinstance(compilador, CacheCompilacion) else compilador
+        print("; Perfil de compilación:", file=sys.stderr)
+        for linea in base.profile_stats.report():
+            print(f";{linea}", file=sys.stderr)
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == "__main__":
+    main()
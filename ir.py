@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Representación intermedia común de los compiladores
+Cada generación (compilador.py ... compilador5.py) conserva su propio
+tokenizador, shunting-yard y emisión de texto assembly; lo común empieza
+después: lower() entrega el texto en un Program, que lo convierte a
+instrucciones tipadas, temporales virtuales y etiquetas (parse_line) recién
+cuando una pasada lo pide. Un PassManager aplica las pasadas de optimización,
+que así se escriben una sola vez y se pueden medir en todas las variantes.
+"""
+
+import argparse
+import importlib
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+
+# Tipos de operando
+REGISTER = 'reg'
+LITERAL = 'lit'
+MEMORY = 'mem'
+LABEL = 'label'
+
+TEMP_NAME = re.compile(r'v_temp(\d+)$')
+
+
+class Temp:
+    """Temporal virtual: todas sus apariciones comparten el objeto, renumerarlo las cambia todas"""
+
+    def __init__(self, index: int):
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return f"v_temp{self.index}"
+
+
+class Operand:
+    def __init__(self, kind: str, value: Union[str, Temp]):
+        self.kind = kind
+        self.value = value
+
+    @property
+    def is_temp(self) -> bool:
+        return self.kind == MEMORY and isinstance(self.value, Temp)
+
+    @property
+    def text(self) -> str:
+        name = self.value.name if isinstance(self.value, Temp) else self.value
+        return f"({name})" if self.kind == MEMORY else name
+
+
+class Instruction:
+    def __init__(self, op: str, operands: List[Operand]):
+        self.op = op
+        self.operands = operands
+
+    @property
+    def is_jump(self) -> bool:
+        return self.op.startswith('J')
+
+    @property
+    def memory_accesses(self) -> int:
+        return sum(1 for operand in self.operands if operand.kind == MEMORY)
+
+    @property
+    def text(self) -> str:
+        if not self.operands:
+            return self.op
+        return f"{self.op} {', '.join(operand.text for operand in self.operands)}"
+
+
+class Label:
+    def __init__(self, name: str):
+        self.name = name
+
+    memory_accesses = 0
+
+    @property
+    def text(self) -> str:
+        return f"{self.name}:"
+
+
+Item = Union[Instruction, Label]
+
+
+def parse_operand(text: str, op: str, temps: Dict[int, Temp]) -> Operand:
+    if op.startswith('J'):
+        return Operand(LABEL, text)
+    if text.startswith('(') and text.endswith(')'):
+        name = text[1:-1]
+        match = TEMP_NAME.match(name)
+        if match:
+            index = int(match.group(1))
+            return Operand(MEMORY, temps.setdefault(index, Temp(index)))
+        return Operand(MEMORY, name)
+    if text.lstrip('-').isdigit():
+        return Operand(LITERAL, text)
+    return Operand(REGISTER, text)
+
+
+def parse_line(line: str, temps: Dict[int, Temp]) -> Item:
+    """'ADD A, (v_temp0)' -> Instruction('ADD', [A, (v_temp0)]); 'x:' -> Label('x')"""
+    if line.endswith(':'):
+        return Label(line[:-1])
+    op, operands = parse_instruction(line)
+    return Instruction(op, [parse_operand(operand, op, temps) for operand in operands])
+
+
+def data_lines(data: List[str], temps: int, header: Optional[str] = None) -> List[str]:
+    """Sección DATA: comentario opcional, variables y temporales inicializados en 0"""
+    lines = [] if header is None else [header]
+    lines.append("DATA:")
+    lines.extend(f"{name} 0" for name in data)
+    lines.extend(f"v_temp{i} 0" for i in range(temps))
+    return lines
+
+
+class Program:
+    """
+    Programa ASUA en representación intermedia. El código se guarda como
+    texto y se convierte a instrucciones tipadas recién cuando una pasada lo
+    pide (items), así compilar sin pasadas no paga el análisis. El generador
+    puede entregar el código ya formateado (code_text) en vez de sus líneas.
+    """
+
+    def __init__(self, code: Optional[List[str]], data: List[str], temps: int = 0,
+                 header: Optional[str] = None, memory_accesses: Optional[int] = None,
+                 code_text: Optional[str] = None, lines: Optional[int] = None):
+        self.data = data
+        self.temps = temps
+        self.header = header
+        self._code: Optional[List[str]] = code
+        self._text = code_text
+        self._items: Optional[List[Item]] = None
+        # Conteos ya conocidos (los del generador); se descartan al cambiar el código
+        self._memory = memory_accesses
+        self._lines = lines
+
+    @property
+    def items(self) -> List[Item]:
+        if self._items is None:
+            temps: Dict[int, Temp] = {}
+            self._items = [parse_line(line, temps) for line in self.code()]
+            self._code = None
+            self._text = None
+        return self._items
+
+    @items.setter
+    def items(self, items: List[Item]) -> None:
+        self._items = items
+        self._code = None
+        self._text = None
+        self._memory = None
+        self._lines = None
+
+    def code(self) -> List[str]:
+        if self._code is None and self._items is None:
+            self._code = self._text.split("\n")
+        if self._code is not None:
+            return self._code
+        return [item.text for item in self._items]
+
+    @property
+    def lines(self) -> int:
+        if self._code is not None:
+            return len(self._code)
+        if self._items is not None:
+            return len(self._items)
+        if self._lines is None:
+            self._lines = self._text.count("\n") + 1
+        return self._lines
+
+    @property
+    def memory_accesses(self) -> int:
+        if self._memory is None:
+            if self._items is None:
+                self._memory = sum(count_memory_accesses(line) for line in self.code())
+            else:
+                self._memory = sum(item.memory_accesses for item in self._items)
+        return self._memory
+
+    def text(self) -> str:
+        if self._text is None:
+            return "\n".join(data_lines(self.data, self.temps, self.header) + ["", "CODE:"] + self.code())
+        return "\n".join(data_lines(self.data, self.temps, self.header) + ["", "CODE:", self._text])
+
+
+# Una pasada modifica el programa y retorna cuántos cambios hizo
+Pass = Callable[[Program], int]
+
+
+class PassManager:
+    """Aplica pasadas en orden y registra su efecto sobre líneas y accesos a memoria"""
+
+    def __init__(self, passes: List[Tuple[str, Pass]]):
+        self.passes = list(passes)
+        self.report: List[Dict[str, object]] = []
+
+    def run(self, program: Program) -> Program:
+        for name, run_pass in self.passes:
+            lines, memory = program.lines, program.memory_accesses
+            start = time.perf_counter()
+            changes = run_pass(program)
+            self.report.append({
+                'pasada': name,
+                'cambios': changes,
+                'segundos': time.perf_counter() - start,
+                'lineas': (lines, program.lines),
+                'accesos_memoria': (memory, program.memory_accesses),
+            })
+        return program
+
+
+def compile_with(compiler, expression: str,
+                 passes: Optional[List[Tuple[str, Pass]]] = None) -> Tuple[str, int, int]:
+    """
+    compile() común: el compilador baja la expresión a un Program (lower),
+    se aplican sus pasadas (o las indicadas) y se emite el texto final
+    """
+    program = compiler.lower(expression)
+    manager = PassManager(compiler.passes() if passes is None else passes)
+    manager.run(program)
+    compiler.pass_report = manager.report
+    compiler.lines_count = program.lines
+    compiler.memory_accesses = program.memory_accesses
+    if hasattr(compiler, 'temp_counter'):
+        compiler.temp_counter = program.temps
+
+    profile = getattr(compiler, 'profile_stats', None)
+    if profile is None:
+        return program.text(), compiler.lines_count, compiler.memory_accesses
+    for entry in manager.report:
+        profile.record(f"pasada {entry['pasada']}", entry['segundos'], 0)
+    start = time.perf_counter()
+    text = program.text()
+    profile.record('format', time.perf_counter() - start, program.lines)
+    return text, compiler.lines_count, compiler.memory_accesses
+
+
+# ---------------------------------------------------------------------------
+# Utilidades sobre líneas de texto (las usan los generadores y parse_line)
+# ---------------------------------------------------------------------------
+
+def count_memory_accesses(instruction: str) -> int:
+    """Cantidad de operandos en memoria, ej: 'ADD A, (v_temp0)' -> 1"""
+    return instruction.count('(')
+
+
+def parse_instruction(instruction: str) -> Tuple[str, List[str]]:
+    """'ADD A, (v_temp0)' -> ('ADD', ['A', '(v_temp0)'])"""
+    parts = instruction.split(None, 1)
+    operands = [operand.strip() for operand in parts[1].split(',')] if len(parts) > 1 else []
+    return parts[0], operands
+
+
+# ---------------------------------------------------------------------------
+# Utilidades sobre instrucciones tipadas (las usan las pasadas)
+# ---------------------------------------------------------------------------
+
+def same_operand(first: Operand, second: Operand) -> bool:
+    """Mismo operando: los temporales se comparan por identidad, el resto por nombre"""
+    if first.kind != second.kind:
+        return False
+    if isinstance(first.value, Temp) or isinstance(second.value, Temp):
+        return first.value is second.value
+    return first.value == second.value
+
+
+def is_register(operand: Operand, register: str) -> bool:
+    return operand.kind == REGISTER and operand.value == register
+
+
+def is_mov(item: Item) -> bool:
+    return isinstance(item, Instruction) and item.op == 'MOV' and len(item.operands) == 2
+
+
+def label_positions(items: List[Item]) -> Dict[str, int]:
+    return {item.name: i for i, item in enumerate(items) if isinstance(item, Label)}
+
+
+def is_register_dead(items: List[Item], start: int, register: str,
+                     labels: Dict[str, int]) -> bool:
+    """
+    True si desde start el registro se sobrescribe antes de leerse.
+    Sigue los JMP y es conservador ante saltos condicionales.
+    """
+    visited = set()
+    i = start
+    while i < len(items) and i not in visited:
+        visited.add(i)
+        item = items[i]
+        if isinstance(item, Label):
+            i += 1
+            continue
+        if item.op == 'JMP':
+            i = labels[item.operands[0].value]
+            continue
+        if item.is_jump:
+            return False
+        sources = item.operands[1:] if item.op == 'MOV' else item.operands
+        if any(is_register(operand, register) for operand in sources):
+            return False
+        if item.operands and is_register(item.operands[0], register):
+            return True
+        i += 1
+    return True
+
+
+# Reglas peephole: reciben las instrucciones y una posición, y si aplican
+# retornan (instrucciones consumidas, reemplazo). Si no aplican retornan None.
+PeepholeRule = Callable[[List[Item], int], Optional[Tuple[int, List[Item]]]]
+
+
+def peephole_store_load(items: List[Item], i: int) -> Optional[Tuple[int, List[Item]]]:
+    """MOV (x), A seguido de MOV A, (x): A ya tiene ese valor"""
+    item = items[i]
+    if i + 1 < len(items) and is_mov(item) and is_mov(items[i + 1]):
+        target, source = item.operands
+        following = items[i + 1].operands
+        if (target.kind == MEMORY and is_register(source, 'A')
+                and is_register(following[0], 'A') and same_operand(following[1], target)):
+            return 2, [item]
+    return None
+
+
+def peephole_load_store(items: List[Item], i: int) -> Optional[Tuple[int, List[Item]]]:
+    """MOV A, (x) seguido de MOV (x), A: la escritura no cambia nada"""
+    item = items[i]
+    if i + 1 < len(items) and is_mov(item) and is_mov(items[i + 1]):
+        target, source = item.operands
+        following = items[i + 1].operands
+        if (is_register(target, 'A') and source.kind == MEMORY
+                and same_operand(following[0], source) and is_register(following[1], 'A')):
+            return 2, [item]
+    return None
+
+
+def peephole_dead_load(items: List[Item], i: int) -> Optional[Tuple[int, List[Item]]]:
+    """MOV A, x seguido de otro MOV A, y que no lee A: la primera carga sobra"""
+    item = items[i]
+    if i + 1 < len(items) and is_mov(item) and is_register(item.operands[0], 'A'):
+        following = items[i + 1]
+        if (is_mov(following) and is_register(following.operands[0], 'A')
+                and not is_register(following.operands[1], 'A')):
+            return 2, [following]
+    return None
+
+
+def peephole_jump_to_next(items: List[Item], i: int) -> Optional[Tuple[int, List[Item]]]:
+    """Salto a x cuando x: es una de las etiquetas que vienen a continuación"""
+    item = items[i]
+    if not isinstance(item, Instruction) or not item.is_jump or len(item.operands) != 1:
+        return None
+    target = item.operands[0].value
+    j = i + 1
+    while j < len(items) and isinstance(items[j], Label):
+        if items[j].name == target:
+            return 1, []
+        j += 1
+    return None
+
+
+def peephole_unreachable(items: List[Item], i: int) -> Optional[Tuple[int, List[Item]]]:
+    """Instrucción sin etiqueta después de un JMP: nunca se ejecuta"""
+    item = items[i]
+    if (isinstance(item, Instruction) and item.op == 'JMP'
+            and i + 1 < len(items) and isinstance(items[i + 1], Instruction)):
+        return 2, [item]
+    return None
+
+
+PEEPHOLE_RULES: List[Tuple[str, PeepholeRule]] = [
+    ("store_load", peephole_store_load),
+    ("load_store", peephole_load_store),
+    ("dead_load", peephole_dead_load),
+    ("jump_to_next", peephole_jump_to_next),
+    ("unreachable", peephole_unreachable),
+]
+
+
+def apply_peephole(items: List[Item], rules: List[Tuple[str, PeepholeRule]],
+                   hits: Dict[str, int]) -> List[Item]:
+    """
+    Aplica las reglas hasta que ninguna aplique, contando en hits cuántas
+    veces se usó cada una
+    """
+    for name, _ in rules:
+        hits.setdefault(name, 0)
+
+    changed = True
+    while changed:
+        changed = False
+        optimized = []
+        i = 0
+        while i < len(items):
+            for name, rule in rules:
+                match = rule(items, i)
+                if match is not None:
+                    consumed, replacement = match
+                    optimized.extend(replacement)
+                    i += consumed
+                    hits[name] += 1
+                    changed = True
+                    break
+            else:
+                optimized.append(items[i])
+                i += 1
+        items = optimized
+    return items
+
+
+# ---------------------------------------------------------------------------
+# Pasadas comunes
+# ---------------------------------------------------------------------------
+
+def peephole_pass(rules: Optional[List[Tuple[str, PeepholeRule]]] = None,
+                  hits: Optional[Dict[str, int]] = None) -> Pass:
+    """Pasada con las reglas peephole dadas (por defecto todas)"""
+    rules = PEEPHOLE_RULES if rules is None else rules
+    hits = {} if hits is None else hits
+
+    def run(program: Program) -> int:
+        before = sum(hits.values())
+        program.items = apply_peephole(program.items, rules, hits)
+        return sum(hits.values()) - before
+    return run
+
+
+def dead_temp_stores(program: Program) -> int:
+    """Elimina los MOV (v_tempN), R a temporales que ninguna instrucción lee"""
+    read = set()
+    for item in program.items:
+        if isinstance(item, Instruction):
+            sources = item.operands[1:] if item.op == 'MOV' else item.operands
+            read.update(id(operand.value) for operand in sources if operand.is_temp)
+
+    kept = [item for item in program.items
+            if not (isinstance(item, Instruction) and item.op == 'MOV'
+                    and item.operands[0].is_temp and id(item.operands[0].value) not in read)]
+    removed = len(program.items) - len(kept)
+    program.items = kept
+    return removed
+
+
+def compact_temps(program: Program) -> int:
+    """Renumera los temporales en uso desde 0 y achica DATA; retorna los slots ahorrados"""
+    used: Dict[int, Temp] = {}
+    for item in program.items:
+        for operand in getattr(item, 'operands', []):
+            if operand.is_temp:
+                used.setdefault(id(operand.value), operand.value)
+    for index, temp in enumerate(sorted(used.values(), key=lambda temp: temp.index)):
+        temp.index = index
+    saved = program.temps - len(used)
+    program.temps = len(used)
+    return saved
+
+
+PASSES: Dict[str, Pass] = {
+    'peephole': peephole_pass(),
+    'dead_temp_stores': dead_temp_stores,
+    'compact_temps': compact_temps,
+}
+
+COMPILERS = ['compilador', 'compilador2', 'compilador3', 'compilador4', 'compilador5']
+
+
+def main():
+    """Mide el efecto de las pasadas comunes en todas las generaciones del compilador"""
+    parser = argparse.ArgumentParser(
+        description="Aplica pasadas de la representación intermedia en todos los compiladores")
+    parser.add_argument('expression', help="Expresión en formato 'result = ...'")
+    parser.add_argument('--pasada', action='append', choices=sorted(PASSES), default=[],
+                        help="Pasada a aplicar (se puede repetir; por defecto todas)")
+    args = parser.parse_args()
+    names = args.pasada or list(PASSES)
+
+    for module in COMPILERS:
+        compiler = importlib.import_module(module).Compilador()
+        try:
+            _, lines, memory = compiler.compile(args.expression)
+            passes = compiler.passes() + [(name, PASSES[name]) for name in names]
+            _, new_lines, new_memory = compile_with(compiler, args.expression, passes)
+        except Exception as e:
+            print(f"; {module}: {e}")
+            continue
+        print(f"; {module}: líneas {lines} -> {new_lines}, "
+              f"accesos a memoria {memory} -> {new_memory}")
+        for entry in compiler.pass_report[len(compiler.passes()):]:
+            print(f";   {entry['pasada']}: {entry['cambios']} cambios")
+
+
+if __name__ == "__main__":
+    # Los compiladores importan 'ir': se usa ese módulo y no __main__, para
+    # que las pasadas reconozcan las clases de sus instrucciones
+    importlib.import_module('ir').main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Cota estática de peor caso (WCET) para los programas de compilador5
+Recorre el código generado y acota las instrucciones ejecutadas y los accesos
+a memoria para cualquier valor de 8 bits de las variables. Los únicos saltos
+hacia atrás son los de los loops de *, / y %, que se reconocen por su
+etiqueta y su op_id; cada uno tiene una cota de vueltas conocida. El resto
+del programa se recorre como un grafo acíclico tomando siempre la rama más
+cara, así que la cota es segura aunque el camino no sea factible.
+"""
+
+import argparse
+import importlib
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from simulador import ALU_BINARIAS, MEM, SALTOS, ProgramaASUA
+
+
+LOOP_HEADER = re.compile(r'(loop_mul|div_norm|div_loop|mod_norm|mod_loop)_(\d+)$')
+
+# Máximo de entradas a la cabecera de cada loop por ejecución de la operación
+#   loop_mul: un bit de |b| por vuelta, a lo más 8 vueltas y la salida
+#   *_norm:   el dividendo (>= 1) tiene a lo más 7 ceros iniciales
+#   *_loop:   el contador parte en 8 como máximo
+MAX_VISITS: Dict[str, int] = {
+    'loop_mul': 9,
+    'div_norm': 8,
+    'div_loop': 9,
+    'mod_norm': 8,
+    'mod_loop': 9,
+}
+
+# Con extended_isa el contador de loop_mul es el menor factor m: la vuelta k
+# exige m >= 2^k y el otro factor desplazado (>= 4^k) menor que 128, así que
+# a lo más 4 vueltas y la salida
+MAX_VISITS_EXTENDED: Dict[str, int] = dict(MAX_VISITS, loop_mul=5)
+
+# Entre norm y loop se procesan los 8 bits del dividendo una sola vez:
+# k vueltas de norm (k + 1 entradas) y 8 - k de loop (9 - k entradas)
+MAX_GROUP_VISITS: Dict[str, int] = {
+    'div': 10,
+    'mod': 10,
+}
+
+# (pc, grupo de loops activo, entradas a cada cabecera del grupo)
+Estado = Tuple[int, Optional[Tuple[str, int]], Tuple[int, ...]]
+
+
+def costo_instruccion(instruccion: tuple) -> Tuple[int, int]:
+    """(instrucciones, accesos a memoria) de ejecutar una instrucción, igual que el simulador"""
+    op, destino, fuente = instruccion
+    if op in SALTOS or op == 'NOP':
+        return 1, 0
+    accesos = 1 if fuente[0] == MEM else 0
+    if destino[0] == MEM:
+        if op in ALU_BINARIAS:
+            accesos += 1
+        if op != 'CMP':
+            accesos += 1
+    return 1, accesos
+
+
+class AnalisisPeorCaso:
+    """Grafo de control de un programa con sus loops acotados"""
+
+    def __init__(self, programa: ProgramaASUA, max_visitas: Dict[str, int] = MAX_VISITS):
+        self.programa = programa
+        self.max_visitas = max_visitas
+        self.instrucciones = programa.instrucciones
+        self.costos = [costo_instruccion(instruccion) for instruccion in self.instrucciones]
+        # Cabeceras: índice -> (grupo, posición en el grupo, máximo de entradas)
+        self.cabeceras: Dict[int, Tuple[Tuple[str, int], int, int]] = {}
+        self.grupos: Dict[Tuple[str, int], List[int]] = {}
+        # Rango de instrucciones de cada grupo (de la primera cabecera al último salto atrás)
+        self.rangos: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self.reconocer_loops()
+
+    def reconocer_loops(self) -> None:
+        por_indice = {}
+        for etiqueta, indice in self.programa.etiquetas.items():
+            match = LOOP_HEADER.match(etiqueta)
+            if match:
+                por_indice[indice] = (match.group(1), int(match.group(2)))
+
+        for origen, (op, destino, _) in enumerate(self.instrucciones):
+            if op not in SALTOS or destino > origen:
+                continue
+            if destino not in por_indice:
+                nombres = [e for e, i in self.programa.etiquetas.items() if i == destino]
+                raise Exception(f"Error: Ciclo sin cota conocida en '{', '.join(nombres)}'")
+            loop, op_id = por_indice[destino]
+            grupo = (loop.split('_')[0] if loop != 'loop_mul' else 'mul', op_id)
+            if destino not in self.cabeceras:
+                miembros = self.grupos.setdefault(grupo, [])
+                self.cabeceras[destino] = (grupo, len(miembros), self.max_visitas[loop])
+                miembros.append(destino)
+            inicio, fin = self.rangos.get(grupo, (destino, origen))
+            self.rangos[grupo] = (min(inicio, destino), max(fin, origen))
+
+    def entrar(self, pc: int, grupo: Optional[Tuple[str, int]],
+               cuentas: Tuple[int, ...]) -> Optional[Estado]:
+        """Estado al llegar a pc, o None si se superaría la cota de un loop"""
+        if pc in self.cabeceras:
+            nuevo, posicion, maximo = self.cabeceras[pc]
+            if nuevo != grupo:
+                grupo, cuentas = nuevo, (0,) * len(self.grupos[nuevo])
+            lista = list(cuentas)
+            lista[posicion] += 1
+            if lista[posicion] > maximo or sum(lista) > MAX_GROUP_VISITS.get(grupo[0], sum(lista)):
+                return None
+            return pc, grupo, tuple(lista)
+        if grupo is not None:
+            inicio, fin = self.rangos[grupo]
+            if not inicio <= pc <= fin:
+                # Fuera del rango ya no se puede volver a ninguna cabecera del grupo
+                return pc, None, ()
+        return pc, grupo, cuentas
+
+    def sucesores(self, pc: int) -> List[int]:
+        op, destino, _ = self.instrucciones[pc]
+        if op == 'JMP':
+            return [destino]
+        if op in SALTOS:
+            return [pc + 1, destino]
+        return [pc + 1]
+
+    def peor_caso(self, inicio: int = 0, fin: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Cota de (instrucciones, accesos a memoria) desde 'inicio' hasta salir
+        de [inicio, fin). Cada componente se maximiza por separado.
+        """
+        fin = len(self.instrucciones) if fin is None else fin
+        memo: Dict[Estado, Optional[Tuple[int, int]]] = {}
+
+        def siguientes(estado: Estado) -> List[Optional[Estado]]:
+            pc, grupo, cuentas = estado
+            return [n if not inicio <= n < fin else self.entrar(n, grupo, cuentas)
+                    for n in self.sucesores(pc)]
+
+        raiz = self.entrar(inicio, None, ()) if inicio < fin else None
+        if raiz is None:
+            return 0, 0
+        # Recorrido en postorden sin recursión (el grafo de estados es acíclico)
+        pendientes = [raiz]
+        while pendientes:
+            estado = pendientes[-1]
+            if estado in memo:
+                pendientes.pop()
+                continue
+            faltan = [s for s in siguientes(estado)
+                      if isinstance(s, tuple) and s not in memo]
+            if faltan:
+                pendientes.extend(faltan)
+                continue
+            pendientes.pop()
+            mejor = None
+            for s in siguientes(estado):
+                valor = (0, 0) if isinstance(s, int) else (memo[s] if s is not None else None)
+                if valor is not None:
+                    mejor = valor if mejor is None else (max(mejor[0], valor[0]),
+                                                         max(mejor[1], valor[1]))
+            if mejor is not None:
+                costo = self.costos[estado[0]]
+                mejor = (mejor[0] + costo[0], mejor[1] + costo[1])
+            memo[estado] = mejor
+
+        resultado = memo[raiz]
+        if resultado is None:
+            raise Exception("Error: Ningún camino respeta las cotas de los loops")
+        return resultado
+
+
+def indices_instrucciones(codigo: List[str]) -> List[int]:
+    """Para cada línea de CODE, índice de la instrucción que le corresponde (saltando etiquetas)"""
+    indices = []
+    contador = 0
+    for linea in codigo:
+        indices.append(contador)
+        if not linea.endswith(':'):
+            contador += 1
+    indices.append(contador)
+    return indices
+
+
+class ReportePeorCaso:
+    def __init__(self, instrucciones: int, accesos_memoria: int, lineas: int,
+                 operadores: List[Tuple[str, int, int]]):
+        self.instrucciones = instrucciones
+        self.accesos_memoria = accesos_memoria
+        self.lineas = lineas
+        # (token, instrucciones, accesos a memoria) de cada token con código propio
+        self.operadores = operadores
+
+
+def reporte_peor_caso(compilador, expresion: str) -> ReportePeorCaso:
+    """
+    Cota del programa completo (tal como lo emite compile()) y de cada token
+    de la expresión. Las cotas por token se calculan sobre el código antes
+    de la poda de chequeos y el peephole, que no conservan los rangos.
+    """
+    compilador.record_spans = True
+    try:
+        bajado = compilador.lower(expresion)
+        spans = list(compilador.token_spans)
+    finally:
+        compilador.record_spans = False
+        compilador.token_spans = []
+    indices = indices_instrucciones(bajado.code())
+    max_visitas = MAX_VISITS_EXTENDED if getattr(compilador, 'extended_isa', False) else MAX_VISITS
+    analisis = AnalisisPeorCaso(ProgramaASUA(bajado.text()), max_visitas)
+    operadores = []
+    for token, inicio, fin in spans:
+        if inicio == fin:
+            continue
+        instrucciones, accesos = analisis.peor_caso(indices[inicio], indices[fin])
+        operadores.append((token, instrucciones, accesos))
+
+    assembly, lineas, _ = compilador.compile(expresion)
+    instrucciones, accesos = AnalisisPeorCaso(ProgramaASUA(assembly), max_visitas).peor_caso()
+    return ReportePeorCaso(instrucciones, accesos, lineas, operadores)
+
+
+def imprimir_reporte(reporte: ReportePeorCaso, salida=sys.stdout) -> None:
+    print("; Peor caso (cota estática sobre todas las entradas de 8 bits):", file=salida)
+    for token, instrucciones, accesos in reporte.operadores:
+        print(f";   {token:>8}: {instrucciones} instrucciones, {accesos} accesos a memoria",
+              file=salida)
+    print(f";   programa: {reporte.instrucciones} instrucciones, "
+          f"{reporte.accesos_memoria} accesos a memoria ({reporte.lineas} líneas)", file=salida)
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Cota de peor caso de instrucciones y accesos a memoria de una expresión")
+    parser.add_argument('expression', help="Expresión en formato 'result = ...'")
+    parser.add_argument('--opcion', action='append', default=[],
+                        help="Opción booleana de Compilador a activar (ej: --opcion peephole)")
+    args = parser.parse_args()
+
+    try:
+        compilador = importlib.import_module('compilador5').Compilador(
+            **{opcion: True for opcion in args.opcion})
+        imprimir_reporte(reporte_peor_caso(compilador, args.expression))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
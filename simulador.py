@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Simulador de la arquitectura ASUA
+Ejecuta el código generado por los compiladores (secciones DATA: y CODE:)
+y reporta instrucciones ejecutadas, lecturas/escrituras a memoria y saltos
+"""
+
+import argparse
+import importlib
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+# Códigos internos de operandos
+REG = 0
+LIT = 1
+MEM = 2
+
+SALTOS = {'JMP', 'JEQ', 'JNE', 'JGT', 'JGE', 'JLT', 'JLE', 'JCR', 'JOV'}
+ALU_BINARIAS = {'ADD', 'SUB', 'AND', 'OR', 'XOR', 'CMP'}
+ALU_UNARIAS = {'NOT', 'SHL', 'SHR', 'INC', 'DEC'}
+REGISTROS = {'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'}
+
+
+def a_byte(valor: int) -> int:
+    """Convierte un entero con signo a su representación de 8 bits"""
+    return valor & 0xFF
+
+
+def a_con_signo(valor: int) -> int:
+    """Interpreta un byte como entero con signo (complemento a 2)"""
+    return valor - 256 if valor & 0x80 else valor
+
+
+class Estadisticas:
+    """Contadores de una ejecución. Se asume un ciclo por instrucción."""
+
+    def __init__(self):
+        self.instrucciones = 0
+        self.lecturas = 0
+        self.escrituras = 0
+        self.saltos = 0
+        self.saltos_tomados = 0
+        self.visitas: Dict[str, int] = {}
+
+    @property
+    def ciclos(self) -> int:
+        return self.instrucciones
+
+    @property
+    def accesos_memoria(self) -> int:
+        return self.lecturas + self.escrituras
+
+    def como_dict(self) -> Dict[str, int]:
+        return {
+            'ciclos': self.ciclos,
+            'instrucciones': self.instrucciones,
+            'lecturas': self.lecturas,
+            'escrituras': self.escrituras,
+            'accesos_memoria': self.accesos_memoria,
+            'saltos': self.saltos,
+            'saltos_tomados': self.saltos_tomados,
+        }
+
+
+class ProgramaASUA:
+    """Programa ASUA ya parseado y listo para ejecutarse varias veces"""
+
+    def __init__(self, texto: str):
+        self.datos: Dict[str, int] = {}
+        self.orden_datos: List[str] = []
+        self.instrucciones: List[Tuple] = []
+        self.fuente: List[str] = []
+        self.etiquetas: Dict[str, int] = {}
+        self._parsear(texto)
+
+    def _parsear(self, texto: str):
+        seccion = None
+        pendientes = []
+        for numero, linea in enumerate(texto.splitlines(), 1):
+            linea = linea.split(';', 1)[0].strip()
+            if not linea:
+                continue
+            if linea.upper() == 'DATA:':
+                seccion = 'DATA'
+                continue
+            if linea.upper() == 'CODE:':
+                seccion = 'CODE'
+                continue
+
+            if seccion == 'DATA':
+                partes = linea.split()
+                if len(partes) != 2:
+                    raise Exception(f"Error: Línea {numero} inválida en DATA: '{linea}'")
+                nombre, valor = partes
+                if nombre not in self.datos:
+                    self.orden_datos.append(nombre)
+                self.datos[nombre] = a_byte(int(valor, 0))
+            elif seccion == 'CODE':
+                if linea.endswith(':'):
+                    self.etiquetas[linea[:-1]] = len(self.instrucciones)
+                    continue
+                self.instrucciones.append(self._decodificar(linea, numero))
+                self.fuente.append(linea)
+                if self.instrucciones[-1][0] in SALTOS:
+                    pendientes.append((len(self.instrucciones) - 1, numero))
+            else:
+                raise Exception(f"Error: Línea {numero} fuera de las secciones DATA/CODE")
+
+        # Resolver destinos de salto
+        for indice, numero in pendientes:
+            op, destino, _ = self.instrucciones[indice]
+            if destino not in self.etiquetas:
+                raise Exception(f"Error: Etiqueta '{destino}' no definida (línea {numero})")
+            self.instrucciones[indice] = (op, self.etiquetas[destino], None)
+
+    def _operando(self, texto: str, numero: int) -> Tuple[int, object]:
+        texto = texto.strip()
+        if texto.startswith('(') and texto.endswith(')'):
+            nombre = texto[1:-1].strip()
+            if nombre not in self.datos:
+                raise Exception(f"Error: Dirección '{nombre}' no declarada en DATA (línea {numero})")
+            return (MEM, nombre)
+        if texto.upper() in REGISTROS:
+            return (REG, texto.upper())
+        try:
+            return (LIT, a_byte(int(texto, 0)))
+        except ValueError:
+            raise Exception(f"Error: Operando inválido '{texto}' (línea {numero})")
+
+    def _decodificar(self, linea: str, numero: int) -> Tuple:
+        partes = linea.split(None, 1)
+        op = partes[0].upper()
+        argumentos = [a for a in partes[1].split(',')] if len(partes) > 1 else []
+
+        if op in SALTOS:
+            if len(argumentos) != 1:
+                raise Exception(f"Error: Salto sin destino (línea {numero})")
+            return (op, argumentos[0].strip(), None)
+        if op == 'NOP':
+            return (op, None, None)
+        if op == 'MOV' or op in ALU_BINARIAS:
+            if len(argumentos) != 2:
+                raise Exception(f"Error: '{op}' requiere dos operandos (línea {numero})")
+            destino = self._operando(argumentos[0], numero)
+            fuente = self._operando(argumentos[1], numero)
+            if destino[0] == LIT and op != 'CMP':
+                raise Exception(f"Error: Destino inválido en '{linea}' (línea {numero})")
+            return (op, destino, fuente)
+        if op in ALU_UNARIAS:
+            if len(argumentos) == 1:
+                destino = self._operando(argumentos[0], numero)
+                return (op, destino, destino)
+            if len(argumentos) == 2:
+                return (op, self._operando(argumentos[0], numero), self._operando(argumentos[1], numero))
+        raise Exception(f"Error: Instrucción no soportada '{linea}' (línea {numero})")
+
+    def ejecutar(self, valores: Optional[Dict[str, int]] = None, max_pasos: int = 1000000,
+                 perfil: bool = False) -> Tuple[Dict[str, int], Estadisticas]:
+        """
+        Ejecuta el programa
+
+        Args:
+            valores: Valores con signo para las variables (por ejemplo {'a': 3, 'b': -4})
+            max_pasos: Límite de instrucciones antes de abortar (evita loops infinitos)
+            perfil: Si es True, cuenta cuántas veces se entra a cada etiqueta
+
+        Returns:
+            Tupla con (memoria final, estadísticas)
+        """
+        memoria = dict(self.datos)
+        for nombre, valor in (valores or {}).items():
+            for candidato in (f"v_{nombre}", nombre):
+                if candidato in memoria:
+                    memoria[candidato] = a_byte(valor)
+                    break
+            else:
+                raise Exception(f"Error: Variable '{nombre}' no existe en DATA")
+
+        registros = {r: 0 for r in REGISTROS}
+        z = n = c = v = 0
+        stats = Estadisticas()
+        lecturas = escrituras = saltos = tomados = 0
+        codigo = self.instrucciones
+        total = len(codigo)
+        conteo = [0] * (total + 1) if perfil else None
+        pc = 0
+        pasos = 0
+
+        while pc < total:
+            pasos += 1
+            if pasos > max_pasos:
+                raise Exception(f"Error: Se superó el límite de {max_pasos} instrucciones")
+            if conteo is not None:
+                conteo[pc] += 1
+            op, destino, fuente = codigo[pc]
+            pc += 1
+
+            if op in SALTOS:
+                saltos += 1
+                if op == 'JMP':
+                    salta = True
+                elif op == 'JEQ':
+                    salta = z == 1
+                elif op == 'JNE':
+                    salta = z == 0
+                elif op == 'JLT':
+                    salta = n == 1
+                elif op == 'JGE':
+                    salta = n == 0
+                elif op == 'JGT':
+                    salta = n == 0 and z == 0
+                elif op == 'JLE':
+                    salta = n == 1 or z == 1
+                elif op == 'JCR':
+                    salta = c == 1
+                else:
+                    salta = v == 1
+                if salta:
+                    tomados += 1
+                    pc = destino
+                continue
+
+            if op == 'NOP':
+                continue
+
+            # Leer fuente
+            tipo, valor = fuente
+            if tipo == REG:
+                b = registros[valor]
+            elif tipo == LIT:
+                b = valor
+            else:
+                b = memoria[valor]
+                lecturas += 1
+
+            if op == 'MOV':
+                resultado = b
+            else:
+                if op in ALU_BINARIAS:
+                    tipo, valor = destino
+                    if tipo == REG:
+                        a = registros[valor]
+                    elif tipo == LIT:
+                        a = valor
+                    else:
+                        a = memoria[valor]
+                        lecturas += 1
+                else:
+                    a = b
+
+                if op == 'ADD':
+                    total_op = a + b
+                    c = 1 if total_op > 0xFF else 0
+                    resultado = total_op & 0xFF
+                    v = 1 if (~(a ^ b) & (a ^ resultado) & 0x80) else 0
+                elif op == 'SUB' or op == 'CMP':
+                    resultado = (a - b) & 0xFF
+                    c = 1 if a < b else 0
+                    v = 1 if ((a ^ b) & (a ^ resultado) & 0x80) else 0
+                elif op == 'AND':
+                    resultado = a & b
+                elif op == 'OR':
+                    resultado = a | b
+                elif op == 'XOR':
+                    resultado = a ^ b
+                elif op == 'NOT':
+                    resultado = (~b) & 0xFF
+                elif op == 'SHL':
+                    c = (b >> 7) & 1
+                    resultado = (b << 1) & 0xFF
+                elif op == 'SHR':
+                    c = b & 1
+                    resultado = b >> 1
+                elif op == 'INC':
+                    resultado = (b + 1) & 0xFF
+                    v = 1 if resultado == 0x80 else 0
+                else:
+                    resultado = (b - 1) & 0xFF
+                    v = 1 if resultado == 0x7F else 0
+                z = 1 if resultado == 0 else 0
+                n = resultado >> 7
+                if op == 'CMP':
+                    continue
+
+            tipo, valor = destino
+            if tipo == REG:
+                registros[valor] = resultado
+            else:
+                memoria[valor] = resultado
+                escrituras += 1
+
+        stats.instrucciones = pasos
+        stats.lecturas = lecturas
+        stats.escrituras = escrituras
+        stats.saltos = saltos
+        stats.saltos_tomados = tomados
+        if conteo is not None:
+            for etiqueta, indice in self.etiquetas.items():
+                stats.visitas[etiqueta] = conteo[indice]
+        return memoria, stats
+
+
+def leer_resultado(memoria: Dict[str, int]) -> Tuple[int, int]:
+    """Retorna (result, error) con el resultado interpretado con signo"""
+    resultado = memoria.get('v_result', memoria.get('result', 0))
+    error = memoria.get('v_error', memoria.get('error', 0))
+    return a_con_signo(resultado), error
+
+
+def simular(assembly: str, valores: Optional[Dict[str, int]] = None,
+            max_pasos: int = 1000000) -> Tuple[int, int, Estadisticas]:
+    """Parsea y ejecuta un programa; retorna (result, error, estadísticas)"""
+    programa = ProgramaASUA(assembly)
+    memoria, stats = programa.ejecutar(valores, max_pasos)
+    resultado, error = leer_resultado(memoria)
+    return resultado, error, stats
+
+
+def parsear_valores(asignaciones: List[str]) -> Dict[str, int]:
+    """Convierte argumentos del tipo 'a=3' en un diccionario"""
+    valores = {}
+    for asignacion in asignaciones:
+        if '=' not in asignacion:
+            raise Exception(f"Error: Valor inválido '{asignacion}', se espera nombre=valor")
+        nombre, valor = asignacion.split('=', 1)
+        numero = int(valor, 0)
+        if not -128 <= numero <= 255:
+            raise Exception(f"Error: El valor de '{nombre}' no cabe en 8 bits")
+        valores[nombre.strip()] = numero
+    return valores
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Simula un programa ASUA y reporta estadísticas de ejecución")
+    parser.add_argument('programa',
+                        help="Archivo .asm, o una expresión 'result = ...' si se usa --compilador")
+    parser.add_argument('valores', nargs='*', help="Valores de entrada, por ejemplo a=3 b=-4")
+    parser.add_argument('--compilador', default=None,
+                        help="Módulo compilador a usar para compilar la expresión (ej: compilador5)")
+    parser.add_argument('--max-pasos', type=int, default=1000000)
+    parser.add_argument('--perfil', action='store_true',
+                        help="Muestra cuántas veces se entró a cada etiqueta")
+    args = parser.parse_args()
+
+    try:
+        if args.compilador:
+            modulo = importlib.import_module(args.compilador)
+            assembly, _, _ = modulo.Compilador().compile(args.programa)
+        else:
+            with open(args.programa, encoding='utf-8') as archivo:
+                assembly = archivo.read()
+
+        programa = ProgramaASUA(assembly)
+        memoria, stats = programa.ejecutar(parsear_valores(args.valores), args.max_pasos,
+                                           perfil=args.perfil)
+        resultado, error = leer_resultado(memoria)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"; Resultado: {resultado}")
+    print(f"; Error: {error}")
+    print(f"; Ciclos: {stats.ciclos}")
+    print(f"; Instrucciones ejecutadas: {stats.instrucciones}")
+    print(f"; Lecturas a memoria: {stats.lecturas}")
+    print(f"; Escrituras a memoria: {stats.escrituras}")
+    print(f"; Saltos tomados: {stats.saltos_tomados} de {stats.saltos}")
+    if args.perfil:
+        print("; Entradas por etiqueta:")
+        for etiqueta, visitas in stats.visitas.items():
+            if visitas:
+                print(f";   {etiqueta}: {visitas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Verificación exhaustiva de los operadores generados por los compiladores
+Compila 'result = a <op> b', lo ejecuta en el simulador ASUA para todos los
+pares de operandos de 8 bits y compara contra el modelo de referencia.
+Con --equivalencia compara dos programas de la misma expresión (por ejemplo
+sin y con una optimización) sobre todas las entradas, o una muestra si son
+demasiadas, y reporta la primera diferencia en v_result o v_error.
+Con --cache comprueba que la cache de compilación no acepte expresiones que el
+compilador rechaza.
+"""
+
+import argparse
+import importlib
+import itertools
+import random
+import re
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from simulador import ProgramaASUA, a_con_signo, leer_resultado
+
+
+def valor_absoluto(x: int) -> int:
+    """Valor absoluto de 8 bits: |-128| = 128 (no cabe con signo)"""
+    return -x if x < 0 else x
+
+
+def modelo_suma(a: int, b: int) -> Tuple[int, int]:
+    total = a + b
+    if not -128 <= total <= 127:
+        return 1, 1
+    return total, 0
+
+
+def modelo_resta(a: int, b: int) -> Tuple[int, int]:
+    total = a - b
+    if not -128 <= total <= 127:
+        return 1, 1
+    return total, 0
+
+
+def modelo_multiplicacion(a: int, b: int) -> Tuple[int, int]:
+    producto = valor_absoluto(a) * valor_absoluto(b)
+    if producto >= 128:
+        return 1, 1
+    if (a < 0) != (b < 0):
+        producto = -producto
+    return producto, 0
+
+
+def modelo_division(a: int, b: int) -> Tuple[int, int]:
+    if b == 0:
+        return 1, 1
+    cociente = valor_absoluto(a) // valor_absoluto(b)
+    if (a < 0) != (b < 0):
+        cociente = -cociente
+    # -128 / -1 = 128 no cabe y se envuelve a -128 (sin marcar error)
+    return a_con_signo(cociente & 0xFF), 0
+
+
+def modelo_modulo(a: int, b: int) -> Tuple[int, int]:
+    if b == 0:
+        return 1, 1
+    return a % valor_absoluto(b), 0
+
+
+def modelo_multiplicacion_sin_signo(a: int, b: int) -> Tuple[int, int]:
+    """compilador4 no detecta overflow: el producto se envuelve a 8 bits"""
+    return a_con_signo((a * b) & 0xFF), 0
+
+
+MODELOS: Dict[str, Dict[str, Callable[[int, int], Tuple[int, int]]]] = {
+    'compilador5': {
+        '+': modelo_suma,
+        '-': modelo_resta,
+        '*': modelo_multiplicacion,
+        '/': modelo_division,
+        '%': modelo_modulo,
+    },
+    'compilador4': {
+        '*': modelo_multiplicacion_sin_signo,
+    },
+}
+
+
+class ReporteOperador:
+    """Resultado de verificar un operador sobre todos los pares"""
+
+    def __init__(self, operador: str):
+        self.operador = operador
+        self.casos = 0
+        self.errores: List[Tuple[int, int, Tuple[int, int], Tuple[int, int]]] = []
+        self.instrucciones = 0
+        self.maximo_instrucciones = 0
+        self.accesos_memoria = 0
+        self.iteraciones = 0
+
+    @property
+    def promedio_instrucciones(self) -> float:
+        return self.instrucciones / self.casos if self.casos else 0.0
+
+    @property
+    def promedio_iteraciones(self) -> float:
+        return self.iteraciones / self.casos if self.casos else 0.0
+
+
+def pares_operandos(muestra: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Todos los pares de 8 bits con signo, o uno de cada 'muestra' pares"""
+    pares = [(a, b) for a in range(-128, 128) for b in range(-128, 128)]
+    if muestra:
+        pares = pares[::muestra]
+    return pares
+
+
+def es_etiqueta_de_loop(etiqueta: str) -> bool:
+    """Etiquetas que marcan el inicio de una iteración de los loops generados"""
+    return 'loop_' in etiqueta
+
+
+def verificar_operador(compilador, operador: str,
+                       modelo: Callable[[int, int], Tuple[int, int]],
+                       pares: List[Tuple[int, int]]) -> ReporteOperador:
+    """Ejecuta 'result = a <op> b' para cada par y lo compara con el modelo"""
+    assembly, _, _ = compilador.compile(f"result = a {operador} b")
+    programa = ProgramaASUA(assembly)
+    loops = [indice for etiqueta, indice in programa.etiquetas.items()
+             if es_etiqueta_de_loop(etiqueta)]
+    reporte = ReporteOperador(operador)
+
+    for a, b in pares:
+        memoria, stats = programa.ejecutar({'a': a, 'b': b}, perfil=bool(loops))
+        obtenido = leer_resultado(memoria)
+        esperado = modelo(a, b)
+        reporte.casos += 1
+        reporte.instrucciones += stats.instrucciones
+        reporte.maximo_instrucciones = max(reporte.maximo_instrucciones, stats.instrucciones)
+        reporte.accesos_memoria += stats.accesos_memoria
+        reporte.iteraciones += sum(visitas for etiqueta, visitas in stats.visitas.items()
+                                   if es_etiqueta_de_loop(etiqueta))
+        if obtenido != esperado:
+            reporte.errores.append((a, b, esperado, obtenido))
+    return reporte
+
+
+VARIABLE = re.compile(r'\((?:v_)?([a-g])\)')
+VALORES_BORDE = (-128, -127, -1, 0, 1, 2, 127)
+
+
+def variables_usadas(*programas: ProgramaASUA) -> List[str]:
+    """Variables a..g que lee o escribe alguno de los programas"""
+    usadas = set()
+    for programa in programas:
+        for linea in programa.fuente:
+            usadas.update(VARIABLE.findall(linea))
+    return sorted(usadas)
+
+
+def entradas_equivalencia(variables: List[str], maximo: int,
+                          semilla: int = 0) -> Tuple[Iterator[Dict[str, int]], bool]:
+    """
+    Todas las combinaciones de 8 bits de las variables si son a lo más
+    'maximo'; si no, las combinaciones de valores de borde (hasta la mitad
+    de 'maximo') y el resto al azar con la semilla dada.
+    Retorna (entradas, si es exhaustivo).
+    """
+    if 256 ** len(variables) <= maximo:
+        combinaciones = itertools.product(range(-128, 128), repeat=len(variables))
+        return (dict(zip(variables, valores)) for valores in combinaciones), True
+
+    def muestra() -> Iterator[Dict[str, int]]:
+        bordes = itertools.islice(
+            itertools.product(VALORES_BORDE, repeat=len(variables)), maximo // 2)
+        cantidad = 0
+        for valores in bordes:
+            cantidad += 1
+            yield dict(zip(variables, valores))
+        rng = random.Random(semilla)
+        for _ in range(maximo - cantidad):
+            yield {variable: rng.randint(-128, 127) for variable in variables}
+    return muestra(), False
+
+
+def ejecutar_salida(programa: ProgramaASUA, valores: Dict[str, int]) -> Tuple[object, int]:
+    """((result, error), instrucciones), o el mensaje si la ejecución no termina bien"""
+    try:
+        memoria, stats = programa.ejecutar(valores)
+    except Exception as e:
+        return str(e), 0
+    return leer_resultado(memoria), stats.instrucciones
+
+
+class ReporteEquivalencia:
+    """Resultado de comparar dos programas sobre las mismas entradas"""
+
+    def __init__(self, variables: List[str], exhaustivo: bool):
+        self.variables = variables
+        self.exhaustivo = exhaustivo
+        self.casos = 0
+        self.instrucciones = [0, 0]
+        # (entradas, salida del primero, salida del segundo) de la primera diferencia
+        self.diferencia: Optional[Tuple[Dict[str, int], object, object]] = None
+
+    def promedio_instrucciones(self, programa: int) -> float:
+        return self.instrucciones[programa] / self.casos if self.casos else 0.0
+
+
+def verificar_equivalencia(primero: ProgramaASUA, segundo: ProgramaASUA,
+                           maximo: int = 1 << 16, semilla: int = 0) -> ReporteEquivalencia:
+    """Ejecuta ambos programas con las mismas entradas hasta la primera diferencia"""
+    variables = variables_usadas(primero, segundo)
+    entradas, exhaustivo = entradas_equivalencia(variables, maximo, semilla)
+    reporte = ReporteEquivalencia(variables, exhaustivo)
+    for valores in entradas:
+        salida_primero, instrucciones_primero = ejecutar_salida(primero, valores)
+        salida_segundo, instrucciones_segundo = ejecutar_salida(segundo, valores)
+        reporte.casos += 1
+        reporte.instrucciones[0] += instrucciones_primero
+        reporte.instrucciones[1] += instrucciones_segundo
+        if salida_primero != salida_segundo:
+            reporte.diferencia = (valores, salida_primero, salida_segundo)
+            break
+    return reporte
+
+
+def leer_programa(ruta: str) -> ProgramaASUA:
+    with open(ruta, encoding='utf-8') as archivo:
+        return ProgramaASUA(archivo.read())
+
+
+def main_equivalencia(args) -> None:
+    """Compara dos .asm, o la expresión compilada sin opciones y con las opciones dadas"""
+    try:
+        if args.expresion:
+            modulo = importlib.import_module(args.compilador)
+            base, _, _ = modulo.Compilador().compile(args.expresion)
+            optimizado, _, _ = modulo.Compilador(
+                **{opcion: True for opcion in args.opcion}).compile(args.expresion)
+            programas = (ProgramaASUA(base), ProgramaASUA(optimizado))
+            nombres = ("sin opciones", ", ".join(args.opcion) or "sin opciones")
+        else:
+            programas = tuple(leer_programa(ruta) for ruta in args.equivalencia)
+            nombres = tuple(args.equivalencia)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    reporte = verificar_equivalencia(*programas, maximo=args.maximo, semilla=args.semilla)
+    modo = "exhaustivo" if reporte.exhaustivo else "muestra"
+    print(f"; Variables: {', '.join(reporte.variables) or 'ninguna'} ({modo}, "
+          f"{reporte.casos} casos)")
+    for indice, nombre in enumerate(nombres):
+        print(f";   {nombre}: {reporte.promedio_instrucciones(indice):.1f} instrucciones promedio")
+    if reporte.diferencia is None:
+        print("; Equivalentes: mismo v_result y v_error en todos los casos")
+        sys.exit(0)
+    valores, primero, segundo = reporte.diferencia
+    entradas = " ".join(f"{variable}={valor}" for variable, valor in valores.items())
+    print(f"; Diferencia con {entradas or 'sin entradas'}: "
+          f"{nombres[0]} -> {primero}, {nombres[1]} -> {segundo}")
+    sys.exit(1)
+
+
+def variantes_espacios(expresion: str) -> List[str]:
+    """La expresión con otros separadores, sin espacios y con un carácter inválido"""
+    return [expresion,
+            expresion.replace(' ', '\t'),
+            expresion.replace(' ', ''),
+            expresion.replace(' ', '  '),
+            expresion.replace(' ', '\n', 2),
+            expresion + '\t',
+            expresion.replace(' ', ' x ', 1)]
+
+
+def resultado_compilacion(compilador, expresion: str) -> Tuple[str, ...]:
+    try:
+        return tuple(str(valor) for valor in compilador.compile(expresion))
+    except Exception as e:
+        return ('error', str(e))
+
+
+def main_cache(args) -> None:
+    """
+    Compila un corpus y sus variantes de espacios con una sola cache y con un
+    compilador sin cache: un acierto no puede aceptar una expresión que el
+    compilador rechaza ni devolver otro programa
+    """
+    from benchmark import MEZCLA_POR_DEFECTO, generar_corpus, parsear_mezcla
+    from cache_compilacion import CacheCompilacion
+
+    modulo = importlib.import_module(args.compilador)
+    opciones = {opcion: True for opcion in args.opcion}
+    cache = CacheCompilacion(modulo.Compilador(**opciones))
+    directo = modulo.Compilador(**opciones)
+    corpus = generar_corpus(args.semilla, 200, 3, parsear_mezcla(MEZCLA_POR_DEFECTO), 0.1)
+    casos = 0
+    for expresion in corpus + corpus:
+        for variante in variantes_espacios(expresion):
+            casos += 1
+            esperado = resultado_compilacion(directo, variante)
+            obtenido = resultado_compilacion(cache, variante)
+            if obtenido != esperado:
+                print(f"; Diferencia en {variante!r}: compilador -> {esperado[:2]}, "
+                      f"cache -> {obtenido[:2]}")
+                sys.exit(1)
+    print(f"; Cache de {args.compilador}: {casos} casos, OK "
+          f"({cache.aciertos} aciertos, {cache.fallos} fallos)")
+    sys.exit(0)
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Verifica exhaustivamente los operadores contra el modelo de 8 bits")
+    parser.add_argument('--compilador', default='compilador5')
+    parser.add_argument('--operadores', default=None,
+                        help="Operadores a verificar (por defecto todos los del modelo)")
+    parser.add_argument('--muestra', type=int, default=None,
+                        help="Verifica solo uno de cada N pares (más rápido)")
+    parser.add_argument('--opcion', action='append', default=[],
+                        help="Opción booleana de Compilador a activar (ej: --opcion flag_overflow)")
+    parser.add_argument('--equivalencia', nargs=2, metavar='ASM', default=None,
+                        help="Compara dos programas .asm de la misma expresión")
+    parser.add_argument('--expresion', default=None,
+                        help="Compara la expresión compilada sin opciones contra --opcion")
+    parser.add_argument('--maximo', type=int, default=1 << 16,
+                        help="Casos máximos de la comparación; si hay más entradas se "
+                             "usa una muestra (por defecto 65536)")
+    parser.add_argument('--semilla', type=int, default=0,
+                        help="Semilla de la muestra aleatoria de entradas")
+    parser.add_argument('--cache', action='store_true',
+                        help="Comprueba que la cache de compilación responda igual que "
+                             "el compilador, incluidas las expresiones que rechaza")
+    args = parser.parse_args()
+
+    if args.cache:
+        main_cache(args)
+    if args.equivalencia or args.expresion:
+        main_equivalencia(args)
+    if args.compilador not in MODELOS:
+        parser.error(f"no hay modelos para {args.compilador} (use {', '.join(sorted(MODELOS))})")
+
+    modelos = MODELOS[args.compilador]
+    operadores = args.operadores or ''.join(modelos)
+    compilador = importlib.import_module(args.compilador).Compilador(
+        **{opcion: True for opcion in args.opcion})
+    pares = pares_operandos(args.muestra)
+
+    fallo = False
+    for operador in operadores:
+        if operador not in modelos:
+            print(f"Error: No hay modelo para '{operador}' en {args.compilador}", file=sys.stderr)
+            sys.exit(1)
+        reporte = verificar_operador(compilador, operador, modelos[operador], pares)
+        estado = "OK" if not reporte.errores else f"{len(reporte.errores)} diferencias"
+        print(f"; a {operador} b: {reporte.casos} casos, {estado}")
+        print(f";   Instrucciones promedio: {reporte.promedio_instrucciones:.1f} "
+              f"(máximo {reporte.maximo_instrucciones})")
+        print(f";   Iteraciones de loop promedio: {reporte.promedio_iteraciones:.2f}")
+        for a, b, esperado, obtenido in reporte.errores[:5]:
+            print(f";   a={a} b={b}: esperado {esperado}, obtenido {obtenido}")
+        fallo = fallo or bool(reporte.errores)
+
+    sys.exit(1 if fallo else 0)
+
+
+if __name__ == "__main__":
+    main()